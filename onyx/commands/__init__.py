@@ -1,3 +1,27 @@
 """
 Commands module for Onyx utilities.
 """
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional, faster JSON parser/encoder
+    orjson = None
+
+
+def dumps(data: Any, indent: bool = True) -> str:
+    """Serialize ``data`` as JSON, using orjson when it is installed.
+
+    Indented output uses two spaces; otherwise the record is compact (one
+    line, no spaces). Both paths produce identical text.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+    if indent:
+        return json.dumps(data, indent=2, ensure_ascii=False)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+loads = orjson.loads if orjson is not None else json.loads
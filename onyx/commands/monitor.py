@@ -3,14 +3,62 @@ System monitoring command for resource tracking.
 """
 
 import os
+import queue
+import re
+import threading
 import time
-import json
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-from collections import defaultdict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from collections import deque, Counter
+from dataclasses import dataclass
 import rich_click as click
 import psutil
-from tqdm import tqdm
+
+
+class OnlineStats:
+    """Single-pass running mean/min/max (Welford) for a tracked metric."""
+
+    __slots__ = ("n", "mean", "m2", "mn", "mx")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.mn = float("inf")
+        self.mx = float("-inf")
+
+    def add(self, x: float) -> None:
+        self.n += 1
+        d = x - self.mean
+        self.mean += d / self.n
+        self.m2 += d * (x - self.mean)
+        if x < self.mn:
+            self.mn = x
+        if x > self.mx:
+            self.mx = x
+
+
+_ALERT_LABELS = {'cpu': 'CPU', 'memory': 'Memory', 'disk': 'Disk'}
+_MAX_ALERTS = 10000
+
+
+@dataclass(slots=True)
+class Alert:
+    """A threshold breach recorded while monitoring."""
+    type: str
+    value: float
+    threshold: float
+    timestamp: str
+    detail: str = ''
+
+    @property
+    def message(self) -> str:
+        label = _ALERT_LABELS[self.type]
+        if self.detail:
+            label = f"{label} usage high ({self.detail})"
+        else:
+            label = f"{label} usage high"
+        return f"{label}: {self.value:.1f}%"
 
 
 @click.group()
@@ -48,9 +96,16 @@ def system(interval: float, duration: int, output: str, save: str,
         click.echo(f"🚨 Alerts: CPU>{alert_cpu}%, Memory>{alert_memory}%, Disk>{alert_disk}%")
         click.echo()
     
+    # Raw samples are only kept when they have to be written out; the
+    # summary is computed on the fly.
+    keep_samples = bool(save)
     data_points = []
+    cpu_stats = OnlineStats()
+    memory_stats = OnlineStats()
     start_time = time.time()
-    alerts = []
+    alerts = deque(maxlen=_MAX_ALERTS)
+    # Percentages never exceed 100, so higher thresholds can never fire
+    alerts_enabled = min(alert_cpu, alert_memory, alert_disk) < 100.0
     
     try:
         while True:
@@ -65,22 +120,28 @@ def system(interval: float, duration: int, output: str, save: str,
             metrics['timestamp'] = datetime.now().isoformat()
             metrics['elapsed'] = elapsed
             
-            data_points.append(metrics)
+            if keep_samples:
+                data_points.append(metrics)
+            cpu_stats.add(metrics['cpu']['percent'])
+            memory_stats.add(metrics['memory']['percent'])
             
             # Check for alerts
-            current_alerts = _check_alerts(metrics, alert_cpu, alert_memory, alert_disk)
-            alerts.extend(current_alerts)
+            current_alerts = ()
+            if alerts_enabled:
+                current_alerts = _check_alerts(metrics, alert_cpu, alert_memory, alert_disk,
+                                               metrics['timestamp'])
+                alerts.extend(current_alerts)
             
             # Display / emit output
             if output == 'live':
                 _display_live_system_metrics(metrics, current_alerts)
             elif output == 'json':
-                click.echo(json.dumps(metrics, indent=2, default=str))
+                _echo_json(metrics)
             elif output == 'csv':
                 # For CSV we stream flattened rows to stdout
                 flat = _flatten_dict(metrics)
                 # Print header once
-                if not data_points or len(data_points) == 1:
+                if cpu_stats.n == 1:
                     click.echo(','.join(flat.keys()))
                 click.echo(','.join(str(flat[k]) for k in flat.keys()))
             
@@ -95,8 +156,8 @@ def system(interval: float, duration: int, output: str, save: str,
         click.echo(f"💾 Data saved to: {save}")
     
     # Display summary
-    if data_points:
-        _display_system_summary(data_points, alerts)
+    if cpu_stats.n:
+        _display_system_summary(cpu_stats, memory_stats, alerts)
 
 
 @monitor.command()
@@ -139,7 +200,7 @@ def processes(top: int, sort_by: str, filter_user: str, filter_name: str,
             if output == 'live':
                 _display_live_processes(processes_data, show_threads, show_connections)
             elif output == 'json':
-                click.echo(json.dumps(processes_data, indent=2, default=str))
+                _echo_json(processes_data)
             
             time.sleep(interval)
     
@@ -198,7 +259,7 @@ def network(interval: float, interface: str, duration: int, output: str):
                 if output == 'live':
                     _display_live_network_metrics(rates)
                 elif output == 'json':
-                    click.echo(json.dumps(rates, indent=2, default=str))
+                    _echo_json(rates)
             
             previous_stats = current_stats
             time.sleep(interval)
@@ -255,7 +316,7 @@ def disk(path: tuple, interval: float, output: str, show_inodes: bool):
             if output == 'live':
                 _display_live_disk_metrics(disk_metrics, show_inodes)
             elif output == 'json':
-                click.echo(json.dumps(disk_metrics, indent=2, default=str))
+                _echo_json(disk_metrics)
             
             previous_io_stats = current_io_stats
             time.sleep(interval)
@@ -287,6 +348,11 @@ def performance(duration: int, interval: float, output: str):
         'interval': interval,
         'samples': []
     }
+    # The summary only needs running aggregates; raw samples are kept for JSON.
+    keep_samples = output == 'json'
+    stats = {'cpu': OnlineStats(), 'memory': OnlineStats(), 'load': OnlineStats()}
+    
+    from tqdm import tqdm
     
     try:
         with tqdm(total=duration, desc="Benchmarking", unit="s") as pbar:
@@ -294,16 +360,23 @@ def performance(duration: int, interval: float, output: str):
             
             while time.time() - start_time < duration:
                 # Collect comprehensive metrics
-                sample = {
-                    'timestamp': datetime.now().isoformat(),
-                    'elapsed': time.time() - start_time,
-                    'system': _collect_system_metrics(),
-                    'disk_io': _collect_disk_io(),
-                    'network': _collect_network_metrics(),
-                    'load_avg': psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
-                }
+                system_metrics = _collect_system_metrics()
+                load_avg = psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None
                 
-                benchmark_data['samples'].append(sample)
+                stats['cpu'].add(system_metrics['cpu']['percent'])
+                stats['memory'].add(system_metrics['memory']['percent'])
+                if load_avg:
+                    stats['load'].add(load_avg[0])
+                
+                if keep_samples:
+                    benchmark_data['samples'].append({
+                        'timestamp': datetime.now().isoformat(),
+                        'elapsed': time.time() - start_time,
+                        'system': system_metrics,
+                        'disk_io': _collect_disk_io(),
+                        'network': _collect_network_metrics(),
+                        'load_avg': load_avg
+                    })
                 
                 time.sleep(interval)
                 pbar.update(interval)
@@ -314,9 +387,9 @@ def performance(duration: int, interval: float, output: str):
     benchmark_data['end_time'] = datetime.now().isoformat()
     
     if output == 'summary':
-        _display_performance_summary(benchmark_data)
+        _display_performance_summary(benchmark_data, stats)
     elif output == 'json':
-        click.echo(json.dumps(benchmark_data, indent=2, default=str))
+        _echo_json(benchmark_data)
 
 
 def _collect_system_metrics() -> Dict:
@@ -391,6 +464,7 @@ def _collect_process_metrics(top: int, sort_by: str, filter_user: str,
                            show_connections: bool) -> List[Dict]:
     """Collect process metrics."""
     processes = []
+    name_match = re.compile(re.escape(filter_name), re.IGNORECASE).search if filter_name else None
     
     for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 
                                    'memory_percent', 'memory_info', 'create_time',
@@ -402,7 +476,7 @@ def _collect_process_metrics(top: int, sort_by: str, filter_user: str,
             if filter_user and proc_info['username'] != filter_user:
                 continue
             
-            if filter_name and filter_name.lower() not in proc_info['name'].lower():
+            if name_match and not name_match(proc_info['name'] or ''):
                 continue
             
             # Add additional info if requested
@@ -444,68 +518,128 @@ def _collect_network_metrics(interface: Optional[str] = None) -> Dict:
     return net_io
 
 
+# Disk totals change slowly compared to the refresh interval, so statvfs
+# results are reused for a few seconds. Slow or hung mounts (NFS, FUSE) are
+# queried on daemon threads and skipped when they do not answer in time; a
+# mount whose query is still running is not queried again until it returns.
+_DISK_USAGE_TTL = 5.0
+_DISK_QUERY_TIMEOUT = 1.0
+_usage_cache: Dict[str, Tuple[float, Dict]] = {}
+_usage_in_flight = set()
+_usage_lock = threading.Lock()
+
+
+def _cached_disk_usage(path: str, show_inodes: bool) -> Optional[Dict]:
+    """Return a still-fresh cached result for ``path``, if any."""
+    cached = _usage_cache.get(path)
+    if cached and time.monotonic() - cached[0] < _DISK_USAGE_TTL and (not show_inodes or 'inodes' in cached[1]):
+        return cached[1]
+    return None
+
+
+def _query_disk_usage(path: str, show_inodes: bool) -> Dict:
+    """Query usage (and optionally inode) figures for a single mount/path."""
+    cached = _cached_disk_usage(path, show_inodes)
+    if cached is not None:
+        return cached
+    
+    usage = psutil.disk_usage(path)
+    info = {
+        'total': usage.total,
+        'used': usage.used,
+        'free': usage.free,
+        'percent': (usage.used / usage.total) * 100
+    }
+    
+    if show_inodes:
+        # Get inode information (Unix-like systems)
+        try:
+            statvfs = os.statvfs(path)
+            info['inodes'] = {
+                'total': statvfs.f_files,
+                'used': statvfs.f_files - statvfs.f_ffree,
+                'free': statvfs.f_ffree
+            }
+        except (AttributeError, OSError):
+            info['inodes'] = None
+    
+    _usage_cache[path] = (time.monotonic(), info)
+    return info
+
+
+def _query_disk_usage_worker(path: str, show_inodes: bool, done: queue.Queue) -> None:
+    try:
+        done.put((path, _query_disk_usage(path, show_inodes), None))
+    except Exception as e:
+        done.put((path, None, e))
+    finally:
+        with _usage_lock:
+            _usage_in_flight.discard(path)
+
+
+def _query_disk_usage_many(paths: List[str], show_inodes: bool,
+                           errors: Tuple[type, ...]) -> Dict[str, Dict]:
+    """Query several mounts concurrently; unavailable ones are omitted."""
+    results = {}
+    done: queue.Queue = queue.Queue()
+    started = 0
+    for path in paths:
+        cached = _cached_disk_usage(path, show_inodes)
+        if cached is not None:
+            results[path] = cached
+            continue
+        with _usage_lock:
+            if path in _usage_in_flight:
+                # Previous query has not returned yet (hung mount); skip it
+                continue
+            _usage_in_flight.add(path)
+        # Daemon threads so a mount stuck in statvfs never blocks exit
+        threading.Thread(
+            target=_query_disk_usage_worker, args=(path, show_inodes, done), daemon=True
+        ).start()
+        started += 1
+
+    deadline = time.monotonic() + _DISK_QUERY_TIMEOUT
+    for _ in range(started):
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            path, info, error = done.get(timeout=remaining)
+        except queue.Empty:
+            break
+        if error is None:
+            results[path] = info
+        elif not isinstance(error, errors):
+            raise error
+    return results
+
+
 def _collect_disk_usage(paths: tuple, show_inodes: bool) -> List[Dict]:
     """Collect disk usage information."""
     disk_usage = []
     
     if paths:
         # Monitor specific paths
+        results = _query_disk_usage_many(list(paths), show_inodes, (FileNotFoundError,))
         for path in paths:
-            try:
-                usage = psutil.disk_usage(path)
-                disk_info = {
-                    'path': path,
-                    'total': usage.total,
-                    'used': usage.used,
-                    'free': usage.free,
-                    'percent': (usage.used / usage.total) * 100
-                }
-                
-                if show_inodes:
-                    # Get inode information (Unix-like systems)
-                    try:
-                        statvfs = os.statvfs(path)
-                        disk_info['inodes'] = {
-                            'total': statvfs.f_files,
-                            'used': statvfs.f_files - statvfs.f_ffree,
-                            'free': statvfs.f_ffree
-                        }
-                    except (AttributeError, OSError):
-                        disk_info['inodes'] = None
-                
-                disk_usage.append(disk_info)
-            except FileNotFoundError:
-                continue
+            if path in results:
+                disk_usage.append({'path': path, **results[path]})
     else:
         # Monitor all mounted filesystems
         partitions = psutil.disk_partitions()
+        results = _query_disk_usage_many(
+            [p.mountpoint for p in partitions], show_inodes,
+            (PermissionError, FileNotFoundError)
+        )
         for partition in partitions:
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disk_info = {
+            if partition.mountpoint in results:
+                disk_usage.append({
                     'device': partition.device,
                     'mountpoint': partition.mountpoint,
                     'fstype': partition.fstype,
-                    'total': usage.total,
-                    'used': usage.used,
-                    'free': usage.free,
-                    'percent': (usage.used / usage.total) * 100
-                }
-                
-                if show_inodes:
-                    try:
-                        statvfs = os.statvfs(partition.mountpoint)
-                        disk_info['inodes'] = {
-                            'total': statvfs.f_files,
-                            'used': statvfs.f_files - statvfs.f_ffree,
-                            'free': statvfs.f_ffree
-                        }
-                    except (AttributeError, OSError):
-                        disk_info['inodes'] = None
-                
-                disk_usage.append(disk_info)
-            except (PermissionError, FileNotFoundError):
-                continue
+                    **results[partition.mountpoint]
+                })
     
     return disk_usage
 
@@ -567,49 +701,31 @@ def _calculate_disk_io_rates(previous: Dict, current: Dict, time_delta: float) -
 
 
 def _check_alerts(metrics: Dict, cpu_threshold: float, 
-                 memory_threshold: float, disk_threshold: float) -> List[Dict]:
+                 memory_threshold: float, disk_threshold: float,
+                 timestamp: str) -> List[Alert]:
     """Check for system alerts."""
     alerts = []
-    timestamp = datetime.now().isoformat()
     
     # CPU alert
-    if metrics['cpu']['percent'] > cpu_threshold:
-        alerts.append({
-            'type': 'cpu',
-            'level': 'warning',
-            'message': f"CPU usage high: {metrics['cpu']['percent']:.1f}%",
-            'value': metrics['cpu']['percent'],
-            'threshold': cpu_threshold,
-            'timestamp': timestamp
-        })
+    cpu_percent = metrics['cpu']['percent']
+    if cpu_percent > cpu_threshold:
+        alerts.append(Alert('cpu', cpu_percent, cpu_threshold, timestamp))
     
     # Memory alert
-    if metrics['memory']['percent'] > memory_threshold:
-        alerts.append({
-            'type': 'memory',
-            'level': 'warning',
-            'message': f"Memory usage high: {metrics['memory']['percent']:.1f}%",
-            'value': metrics['memory']['percent'],
-            'threshold': memory_threshold,
-            'timestamp': timestamp
-        })
+    memory_percent = metrics['memory']['percent']
+    if memory_percent > memory_threshold:
+        alerts.append(Alert('memory', memory_percent, memory_threshold, timestamp))
 
     # Disk alert (if disk info is available)
     disk_info = metrics.get('disk')
     if disk_info and disk_info.get('percent') is not None and disk_info['percent'] > disk_threshold:
-        alerts.append({
-            'type': 'disk',
-            'level': 'warning',
-            'message': f"Disk usage high ({disk_info.get('mountpoint', '/')}): {disk_info['percent']:.1f}%",
-            'value': disk_info['percent'],
-            'threshold': disk_threshold,
-            'timestamp': timestamp
-        })
+        alerts.append(Alert('disk', disk_info['percent'], disk_threshold, timestamp,
+                            disk_info.get('mountpoint', '/')))
     
     return alerts
 
 
-def _display_live_system_metrics(metrics: Dict, alerts: List[Dict]):
+def _display_live_system_metrics(metrics: Dict, alerts: List[Alert]):
     """Display live system metrics."""
     # Clear screen and move cursor to top
     click.clear()
@@ -646,7 +762,7 @@ def _display_live_system_metrics(metrics: Dict, alerts: List[Dict]):
     if alerts:
         click.echo("\n🚨 ALERTS:")
         for alert in alerts:
-            click.echo(f"   {alert['message']}")
+            click.echo(f"   {alert.message}")
 
 
 def _display_live_processes(processes: List[Dict], show_threads: bool, show_connections: bool):
@@ -741,33 +857,28 @@ def _display_live_disk_metrics(metrics: Dict, show_inodes: bool):
             click.echo(f"{disk:<15} {read_rate:>12} {write_rate:>12} {total_rate:>12}")
 
 
-def _display_system_summary(data_points: List[Dict], alerts: List[Dict]):
+def _display_system_summary(cpu_stats: OnlineStats, memory_stats: OnlineStats,
+                            alerts: deque):
     """Display system monitoring summary."""
     click.echo("\n📊 Monitoring Summary")
     click.echo("=" * 40)
     
-    if not data_points:
+    if not cpu_stats.n:
         return
     
-    # Calculate averages
-    cpu_values = [dp['cpu']['percent'] for dp in data_points]
-    memory_values = [dp['memory']['percent'] for dp in data_points]
-    
     click.echo(f"📈 CPU Usage:")
-    click.echo(f"   Average: {sum(cpu_values) / len(cpu_values):.1f}%")
-    click.echo(f"   Maximum: {max(cpu_values):.1f}%")
-    click.echo(f"   Minimum: {min(cpu_values):.1f}%")
+    click.echo(f"   Average: {cpu_stats.mean:.1f}%")
+    click.echo(f"   Maximum: {cpu_stats.mx:.1f}%")
+    click.echo(f"   Minimum: {cpu_stats.mn:.1f}%")
     
     click.echo(f"\n🧠 Memory Usage:")
-    click.echo(f"   Average: {sum(memory_values) / len(memory_values):.1f}%")
-    click.echo(f"   Maximum: {max(memory_values):.1f}%")
-    click.echo(f"   Minimum: {min(memory_values):.1f}%")
+    click.echo(f"   Average: {memory_stats.mean:.1f}%")
+    click.echo(f"   Maximum: {memory_stats.mx:.1f}%")
+    click.echo(f"   Minimum: {memory_stats.mn:.1f}%")
     
     if alerts:
         click.echo(f"\n🚨 Total Alerts: {len(alerts)}")
-        alert_types = {}
-        for alert in alerts:
-            alert_types[alert['type']] = alert_types.get(alert['type'], 0) + 1
+        alert_types = Counter(alert.type for alert in alerts)
         
         for alert_type, count in alert_types.items():
             click.echo(f"   {alert_type}: {count}")
@@ -798,58 +909,66 @@ def _display_network_summary(data_points: List[Dict]):
     click.echo(f"📥 Average received: {_format_bytes(avg_recv)}/s")
 
 
-def _display_performance_summary(benchmark_data: Dict):
+def _display_performance_summary(benchmark_data: Dict, stats: Dict[str, OnlineStats]):
     """Display performance benchmark summary."""
     click.echo("\n🏃 Performance Benchmark Results")
     click.echo("=" * 50)
     
-    samples = benchmark_data['samples']
-    if not samples:
+    cpu_stats = stats['cpu']
+    if not cpu_stats.n:
         return
     
     # CPU statistics
-    cpu_values = [sample['system']['cpu']['percent'] for sample in samples]
     click.echo(f"💻 CPU Performance:")
-    click.echo(f"   Average: {sum(cpu_values) / len(cpu_values):.1f}%")
-    click.echo(f"   Peak: {max(cpu_values):.1f}%")
+    click.echo(f"   Average: {cpu_stats.mean:.1f}%")
+    click.echo(f"   Peak: {cpu_stats.mx:.1f}%")
     
     # Memory statistics
-    memory_values = [sample['system']['memory']['percent'] for sample in samples]
+    memory_stats = stats['memory']
     click.echo(f"\n🧠 Memory Performance:")
-    click.echo(f"   Average: {sum(memory_values) / len(memory_values):.1f}%")
-    click.echo(f"   Peak: {max(memory_values):.1f}%")
+    click.echo(f"   Average: {memory_stats.mean:.1f}%")
+    click.echo(f"   Peak: {memory_stats.mx:.1f}%")
     
     # Load average (if available)
-    load_values = [sample.get('load_avg', [0, 0, 0])[0] for sample in samples 
-                  if sample.get('load_avg')]
-    if load_values:
+    load_stats = stats['load']
+    if load_stats.n:
         click.echo(f"\n📊 Load Average:")
-        click.echo(f"   Average: {sum(load_values) / len(load_values):.2f}")
-        click.echo(f"   Peak: {max(load_values):.2f}")
+        click.echo(f"   Average: {load_stats.mean:.2f}")
+        click.echo(f"   Peak: {load_stats.mx:.2f}")
     
     click.echo(f"\n⏰ Benchmark Duration: {benchmark_data['duration']} seconds")
-    click.echo(f"📊 Total Samples: {len(samples)}")
+    click.echo(f"📊 Total Samples: {cpu_stats.n}")
 
 
 def _save_monitoring_data(data_points: List[Dict], filepath: str, format_type: str):
     """Save monitoring data to file."""
     if format_type == 'json':
+        import json
+        
         with open(filepath, 'w') as f:
             json.dump(data_points, f, indent=2, default=str)
     elif format_type == 'csv':
         import csv
         
         if data_points:
-            with open(filepath, 'w', newline='') as f:
+            # Large buffer so long captures go out in few write() calls
+            with open(filepath, 'w', newline='', buffering=1024 * 1024) as f:
                 # Flatten first data point to get field names
-                flattened = _flatten_dict(data_points[0])
-                fieldnames = flattened.keys()
-                
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
+                fieldnames = tuple(_flatten_dict(data_points[0]))
                 
-                for dp in data_points:
-                    writer.writerow(_flatten_dict(dp))
+                writer = csv.writer(f)
+                writer.writerow(fieldnames)
+                writer.writerows(
+                    [flat.get(k, '') for k in fieldnames]
+                    for flat in map(_flatten_dict, data_points)
+                )
+
+
+def _echo_json(data) -> None:
+    """Print data as indented JSON (json is only imported when needed)."""
+    import json
+    
+    click.echo(json.dumps(data, indent=2, default=str))
 
 
 def _flatten_dict(d: Dict, parent_key: str = '', sep: str = '_') -> Dict:
@@ -2,17 +2,48 @@
 Network utilities command for connectivity and diagnostics.
 """
 
+import array
+import errno
+import os
+import platform
+import re
+import select
+import selectors
 import socket
+import struct
 import subprocess
 import threading
 import time
-import json
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import compress
+from typing import Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
 import rich_click as click
 from tqdm import tqdm
 
+from onyx.commands import dumps
+
+
+_IS_WINDOWS = platform.system().lower() == 'windows'
+
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    """Return the worker pool for blocking resolver calls, created on first use.
+
+    Used for traceroute's reverse DNS lookups. Workers only wait in the
+    resolver, so the pool is sized from the CPU count rather than a fixed number.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4))
+        return _pool
+
 
 @click.group()
 def net():
@@ -46,75 +77,69 @@ def ping(host: str, count: int, timeout: int, interval: float, size: int,
     
     results = []
     sent = 0
-    received = 0
     lost = 0
-    min_time = float('inf')
-    max_time = 0
-    total_time = 0
+    rtt_samples = array.array('q')  # round trip times in nanoseconds
+    
+    # Real ICMP echo when the OS allows it, otherwise a TCP connect probe
+    pinger = _IcmpPinger.create(ipv6, size)
+    address = None
+    if pinger:
+        try:
+            family = socket.AF_INET6 if ipv6 else socket.AF_INET
+            address = socket.getaddrinfo(host, None, family)[0][4]
+        except socket.gaierror:
+            pass
+    
+    ping_count = None if continuous else count
+    if pinger and address:
+        probes = pinger.run(address, ping_count, interval, timeout)
+    else:
+        probes = _tcp_ping_probes(host, ping_count, interval, timeout, ipv6)
     
     try:
-        ping_count = float('inf') if continuous else count
-        
-        while sent < ping_count:
-            sent += 1
-            start_time = time.time()
-            
-            try:
-                # Perform ping
-                if _ping_host(host, timeout, ipv6):
-                    end_time = time.time()
-                    response_time = (end_time - start_time) * 1000  # Convert to ms
-                    received += 1
-                    
-                    # Update statistics
-                    min_time = min(min_time, response_time)
-                    max_time = max(max_time, response_time)
-                    total_time += response_time
-                    
-                    result = {
-                        'sequence': sent,
-                        'time': response_time,
-                        'status': 'success'
-                    }
-                    
-                    if output == 'table':
-                        click.echo(f"Reply from {host}: bytes={size} time={response_time:.1f}ms")
-                    
-                else:
-                    lost += 1
-                    result = {
-                        'sequence': sent,
-                        'time': None,
-                        'status': 'timeout'
-                    }
-                    
-                    if output == 'table':
-                        click.echo(f"Request timed out.")
+        for sent, rtt_ns in probes:
+            if rtt_ns is not None:
+                rtt_samples.append(rtt_ns)
+                response_time = rtt_ns / 1e6  # Convert to ms
                 
-                results.append(result)
+                result = {
+                    'sequence': sent,
+                    'time': response_time,
+                    'status': 'success'
+                }
                 
-                if not continuous and sent < count:
-                    time.sleep(interval)
-                elif continuous:
-                    time.sleep(interval)
-                    
-            except KeyboardInterrupt:
-                if continuous:
-                    break
-                else:
-                    raise
+                if output == 'table':
+                    click.echo(f"Reply from {host}: bytes={size} time={response_time:.1f}ms")
+                
+            else:
+                lost += 1
+                result = {
+                    'sequence': sent,
+                    'time': None,
+                    'status': 'timeout'
+                }
+                
+                if output == 'table':
+                    click.echo(f"Request timed out.")
+            
+            results.append(result)
                     
     except KeyboardInterrupt:
         click.echo("\nPing interrupted by user")
+    finally:
+        if pinger:
+            pinger.close()
     
     # Calculate statistics
+    received = len(rtt_samples)
     if received > 0:
-        avg_time = total_time / received
+        min_time = min(rtt_samples) / 1e6
+        max_time = max(rtt_samples) / 1e6
+        avg_time = sum(rtt_samples) / received / 1e6
         loss_percent = (lost / sent) * 100
     else:
-        avg_time = 0
+        min_time = max_time = avg_time = 0
         loss_percent = 100
-        min_time = 0
     
     # Display summary
     if output == 'table':
@@ -132,56 +157,84 @@ def ping(host: str, count: int, timeout: int, interval: float, size: int,
             'packets_received': received,
             'packets_lost': lost,
             'loss_percent': loss_percent,
-            'min_time': min_time if min_time != float('inf') else 0,
+            'min_time': min_time,
             'max_time': max_time,
             'avg_time': avg_time,
             'results': results
         }
-        click.echo(json.dumps(summary, indent=2))
+        click.echo(dumps(summary))
 
 
 @net.command()
 @click.argument('host')
 @click.option('--max-hops', '-m', type=int, default=30, help='Maximum number of hops')
 @click.option('--timeout', '-t', type=int, default=5, help='Timeout per hop in seconds')
+@click.option('--resolve/--no-resolve', default=True, help='Look up hop hostnames (reverse DNS)')
 @click.option('--output', '-o', type=click.Choice(['table', 'json']), default='table', help='Output format')
-def traceroute(host: str, max_hops: int, timeout: int, output: str):
+def traceroute(host: str, max_hops: int, timeout: int, resolve: bool, output: str):
     """Trace the route (hops) to a destination host.
 
     Examples:
       onyx net traceroute google.com
       onyx net traceroute 1.1.1.1 --max-hops 20 --timeout 3
+      onyx net traceroute example.com --no-resolve --output json
     """
 
     if output == 'table':
         click.echo(f"🗺️ Tracing route to {host} with maximum {max_hops} hops...")
     
     results = []
+    reached = False
+    destination = _resolve_hostname(host)
     
+    # Probe natively with raw sockets when permitted, else via the system tool
+    sockets = _open_traceroute_sockets(destination) if destination else None
+    if sockets:
+        hops = _traceroute_native(*sockets, destination, max_hops, timeout)
+    else:
+        hops = _traceroute_system(host, max_hops, timeout)
+    
+    lookups = {}
     try:
-        for hop in range(1, max_hops + 1):
-            hop_result = _traceroute_hop(host, hop, timeout)
+        for hop_result in hops:
             results.append(hop_result)
             
+            # Reverse lookups run in the background while the trace continues
+            if resolve and hop_result['status'] == 'success':
+                lookups[hop_result['hop']] = _get_pool().submit(_reverse_dns, hop_result['ip'])
+            
             if output == 'table':
-                if hop_result['status'] == 'success':
-                    click.echo(f"{hop:2d}  {hop_result['time']:.1f} ms  {hop_result['ip']} ({hop_result['hostname']})")
-                elif hop_result['status'] == 'timeout':
-                    click.echo(f"{hop:2d}  *  Request timed out")
-                else:
-                    click.echo(f"{hop:2d}  !  {hop_result['error']}")
+                _echo_hop(hop_result, show_hostname=not resolve)
             
             # Stop if we reached the destination
-            if hop_result['status'] == 'success' and _resolve_hostname(host) == hop_result['ip']:
-                if output == 'table':
-                    click.echo(f"\nTrace complete. Destination reached in {hop} hops.")
+            if hop_result['status'] == 'success' and destination == hop_result['ip']:
+                reached = True
                 break
-        else:
-            if output == 'table':
-                click.echo(f"\nTrace incomplete. Maximum hops ({max_hops}) reached.")
     
     except KeyboardInterrupt:
         click.echo("\nTraceroute interrupted by user")
+    finally:
+        hops.close()
+        if sockets:
+            for sock in sockets:
+                sock.close()
+    
+    for hop_result in results:
+        if hop_result['hop'] in lookups:
+            hop_result['hostname'] = lookups[hop_result['hop']].result()
+    
+    if output == 'table':
+        # Hostnames are listed once resolved so hops could print as they arrived
+        named = [r for r in results if r['hop'] in lookups and r['hostname'] != r['ip']]
+        if named:
+            click.echo("\nHostnames:")
+            for hop_result in named:
+                click.echo(f"{hop_result['hop']:2d}  {hop_result['ip']}  {hop_result['hostname']}")
+        
+        if reached:
+            click.echo(f"\nTrace complete. Destination reached in {results[-1]['hop']} hops.")
+        elif len(results) == max_hops:
+            click.echo(f"\nTrace incomplete. Maximum hops ({max_hops}) reached.")
     
     if output == 'json':
         summary = {
@@ -190,7 +243,7 @@ def traceroute(host: str, max_hops: int, timeout: int, output: str):
             'completed_hops': len(results),
             'results': results
         }
-        click.echo(json.dumps(summary, indent=2))
+        click.echo(dumps(summary))
 
 
 @net.command()
@@ -198,20 +251,26 @@ def traceroute(host: str, max_hops: int, timeout: int, output: str):
 @click.argument('port', type=int)
 @click.option('--timeout', '-t', type=int, default=5, help='Connection timeout in seconds')
 @click.option('--protocol', '-p', type=click.Choice(['tcp', 'udp']), default='tcp', help='Protocol to use')
+@click.option('--ipv6', '-6', is_flag=True, help='Use IPv6')
 @click.option('--output', '-o', type=click.Choice(['table', 'json']), default='table', help='Output format')
-def port(host: str, port: int, timeout: int, protocol: str, output: str):
+def port(host: str, port: int, timeout: int, protocol: str, ipv6: bool, output: str):
     """Check if a specific TCP/UDP port is open on a host.
 
     Examples:
       onyx net port localhost 5432
       onyx net port example.com 443 --protocol tcp --output json
+      onyx net port ::1 8080 --ipv6
     """
 
     if output == 'table':
         click.echo(f"🔌 Checking {protocol.upper()} port {port} on {host}...")
     
     start_time = time.time()
-    result = _check_port(host, port, timeout, protocol)
+    try:
+        family, ip = _resolve_address(host, ipv6)
+        result = _check_port(ip, port, timeout, protocol, family)
+    except socket.gaierror:
+        result = {'status': 'error', 'error': 'Host not found'}
     end_time = time.time()
     
     response_time = (end_time - start_time) * 1000
@@ -233,28 +292,39 @@ def port(host: str, port: int, timeout: int, protocol: str, output: str):
         result['port'] = port
         result['protocol'] = protocol
         result['response_time'] = response_time
-        click.echo(json.dumps(result, indent=2))
+        click.echo(dumps(result))
 
 
 @net.command()
 @click.argument('host')
-@click.option('--start-port', '-s', type=int, default=1, help='Start port number')
-@click.option('--end-port', '-e', type=int, default=1000, help='End port number')
+@click.option('--start-port', '-s', type=click.IntRange(0, 65535), default=1, help='Start port number')
+@click.option('--end-port', '-e', type=click.IntRange(0, 65535), default=1000, help='End port number')
 @click.option('--timeout', '-t', type=float, default=1.0, help='Connection timeout in seconds')
 @click.option('--protocol', '-p', type=click.Choice(['tcp', 'udp']), default='tcp', help='Protocol to use')
-@click.option('--threads', type=int, default=100, help='Number of concurrent threads')
+@click.option('--threads', default='auto', show_default=True,
+              help='Maximum number of concurrent probes, or "auto" to size from the CPU count')
 @click.option('--common-ports', '-c', is_flag=True, help='Scan only common ports')
+@click.option('--polite', is_flag=True, help='Close open TCP ports gracefully instead of with a reset')
+@click.option('--ipv6', '-6', is_flag=True, help='Use IPv6')
 @click.option('--output', '-o', type=click.Choice(['table', 'json']), default='table', help='Output format')
 def scan(host: str, start_port: int, end_port: int, timeout: float, protocol: str,
-         threads: int, common_ports: bool, output: str):
+         threads: str, common_ports: bool, polite: bool, ipv6: bool, output: str):
     """Scan a range of ports on a host.
 
+    TCP probes to open ports are closed with a reset (RST) so local ports do
+    not pile up in TIME_WAIT on large scans; pass [cyan]--polite[/cyan] for a
+    normal close.
+
     Examples:
       onyx net scan localhost --start-port 1 --end-port 1024
       onyx net scan example.com --common-ports
       onyx net scan 192.168.0.1 -s 20 -e 200 --output json
     """
     
+    if threads != 'auto' and not (threads.isdigit() and int(threads) > 0):
+        click.echo(f"❌ Invalid --threads value: {threads} (expected a positive number or 'auto')", err=True)
+        return
+    
     if common_ports:
         ports_to_scan = _get_common_ports()
         click.echo(f"🔍 Scanning {len(ports_to_scan)} common ports on {host}...")
@@ -262,42 +332,49 @@ def scan(host: str, start_port: int, end_port: int, timeout: float, protocol: st
         ports_to_scan = list(range(start_port, end_port + 1))
         click.echo(f"🔍 Scanning ports {start_port}-{end_port} on {host}...")
     
-    open_ports = []
-    closed_ports = []
-    filtered_ports = []
+    if threads == 'auto':
+        # Probes are non-blocking sockets, so this can oversubscribe the CPUs;
+        # never open more than there are ports or fewer than the old default
+        max_in_flight = min(len(ports_to_scan), max(100, (os.cpu_count() or 1) * 8))
+    else:
+        max_in_flight = int(threads)
     
-    def scan_port(port):
-        result = _check_port(host, port, timeout, protocol)
-        return port, result
+    try:
+        family, ip = _resolve_address(host, ipv6)
+    except socket.gaierror:
+        click.echo(f"❌ Could not resolve host: {host}", err=True)
+        return
+    scan_results = _scan_ports(ip, family, ports_to_scan, timeout, protocol, max_in_flight,
+                               abortive_close=not polite)
     
-    # Use thread pool for concurrent scanning
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        # Submit all port scan tasks
-        future_to_port = {
-            executor.submit(scan_port, port): port 
-            for port in ports_to_scan
-        }
-        
-        # Process results with progress bar
-        with tqdm(total=len(ports_to_scan), desc="Scanning ports", 
-                 disable=(output == 'json')) as pbar:
+    # Status per port number; the buckets below come out already sorted
+    status = bytearray(65536)
+    open_results = {}
+    
+    # Progress bar only for larger scans, refreshed in coarse steps
+    pbar = None
+    if output != 'json' and len(ports_to_scan) >= 256:
+        pbar = tqdm(total=len(ports_to_scan), desc="Scanning ports")
+    
+    done = 0
+    try:
+        for port, result in scan_results:
+            code = _SCAN_STATUS_CODES.get(result['status'], 0)
+            status[port] = code
+            if code == 1:
+                open_results[port] = result
             
-            for future in as_completed(future_to_port):
-                port, result = future.result()
-                
-                if result['status'] == 'open':
-                    open_ports.append((port, result))
-                elif result['status'] == 'closed':
-                    closed_ports.append(port)
-                elif result['status'] == 'filtered':
-                    filtered_ports.append(port)
-                
-                pbar.update(1)
+            done += 1
+            if pbar and not done & 63:
+                pbar.update(64)
+    finally:
+        if pbar:
+            pbar.update(done - pbar.n)
+            pbar.close()
     
-    # Sort results
-    open_ports.sort(key=lambda x: x[0])
-    closed_ports.sort()
-    filtered_ports.sort()
+    open_ports = [(port, open_results[port]) for port in _ports_with_status(status, 1)]
+    closed_ports = _ports_with_status(status, 2)
+    filtered_ports = _ports_with_status(status, 3)
     
     # Display results
     if output == 'table':
@@ -332,7 +409,7 @@ def scan(host: str, start_port: int, end_port: int, timeout: float, protocol: st
                 'filtered': len(filtered_ports)
             }
         }
-        click.echo(json.dumps(results, indent=2))
+        click.echo(dumps(results))
 
 
 @net.command()
@@ -379,7 +456,7 @@ def dns(hostname: str, record_type: str, nameserver: str, output: str):
                 'nameserver': nameserver,
                 'records': results
             }
-            click.echo(json.dumps(result_data, indent=2))
+            click.echo(dumps(result_data))
     
     except Exception as e:
         click.echo(f"❌ DNS lookup failed: {e}", err=True)
@@ -418,14 +495,156 @@ def whois(ip_or_domain: str, output: str):
                 'raw_data': whois_data,
                 'parsed_data': parsed_data
             }
-            click.echo(json.dumps(result, indent=2))
+            click.echo(dumps(result))
     
     except Exception as e:
         click.echo(f"❌ WHOIS lookup failed: {e}", err=True)
 
 
+class _IcmpPinger:
+    """ICMP echo requests sent over one socket reused for every probe.
+
+    Raw sockets need elevated privileges; Linux also offers unprivileged
+    datagram "ping" sockets, which are tried next. ``create`` returns None
+    when neither is available so callers can fall back to ``_ping_host``.
+    """
+
+    def __init__(self, sock: socket.socket, ipv6: bool, raw: bool, size: int):
+        self.sock = sock
+        self.ipv6 = ipv6
+        self.raw = raw
+        self.ident = os.getpid() & 0xFFFF
+        self.echo_type = 128 if ipv6 else 8
+        self.reply_type = 129 if ipv6 else 0
+        # Echo packet built once; only the header changes between probes
+        self._packet = bytearray(8) + (bytes(range(256)) * (size // 256 + 1))[:size]
+        self._recv_buf = bytearray(65535)
+
+    @classmethod
+    def create(cls, ipv6: bool, size: int) -> Optional['_IcmpPinger']:
+        family = socket.AF_INET6 if ipv6 else socket.AF_INET
+        proto = socket.IPPROTO_ICMPV6 if ipv6 else socket.IPPROTO_ICMP
+        for sock_type, raw in ((socket.SOCK_RAW, True), (socket.SOCK_DGRAM, False)):
+            try:
+                return cls(socket.socket(family, sock_type, proto), ipv6, raw, size)
+            except (OSError, AttributeError):
+                continue
+        return None
+
+    def run(self, address: tuple, count: Optional[int], interval: float,
+            timeout: float) -> Iterator[Tuple[int, Optional[int]]]:
+        """Send ``count`` probes (forever if None) and yield ``(seq, rtt_ns)``.
+
+        Requests go out every ``interval`` seconds without waiting for the
+        previous reply, and all replies are read in the same select loop.
+        Results are yielded in sequence order; ``rtt_ns`` is None on timeout.
+        """
+        interval_ns = int(interval * 1e9)
+        timeout_ns = int(timeout * 1e9)
+        pending = {}  # 16-bit wire sequence -> (sequence, send time in ns)
+        done = {}
+        next_seq = 1
+        next_yield = 1
+        next_send = time.perf_counter_ns()
+        
+        while count is None or next_yield <= count:
+            now = time.perf_counter_ns()
+            more_to_send = count is None or next_seq <= count
+            
+            if more_to_send and now >= next_send:
+                if self._send(address, next_seq):
+                    pending[next_seq & 0xFFFF] = (next_seq, now)
+                else:
+                    done[next_seq] = None
+                next_seq += 1
+                next_send = now + interval_ns
+                more_to_send = count is None or next_seq <= count
+            
+            for wire_seq, (seq, sent_at) in list(pending.items()):
+                if now - sent_at >= timeout_ns:
+                    del pending[wire_seq]
+                    done[seq] = None
+            
+            while next_yield in done:
+                yield next_yield, done.pop(next_yield)
+                next_yield += 1
+            
+            deadlines = [sent_at + timeout_ns for _, sent_at in pending.values()]
+            if more_to_send:
+                deadlines.append(next_send)
+            if not deadlines:
+                continue
+            
+            wait = max(0, min(deadlines) - time.perf_counter_ns()) / 1e9
+            ready, _, _ = select.select([self.sock], [], [], wait)
+            if not ready:
+                continue
+            try:
+                length = self.sock.recv_into(self._recv_buf)
+            except OSError:
+                continue
+            received_at = time.perf_counter_ns()
+            entry = pending.pop(self._reply_seq(memoryview(self._recv_buf)[:length]), None)
+            if entry:
+                seq, sent_at = entry
+                done[seq] = received_at - sent_at
+
+    def _send(self, address: tuple, seq: int) -> bool:
+        packet = self._packet
+        struct.pack_into('!BBHHH', packet, 0, self.echo_type, 0, 0, self.ident, seq & 0xFFFF)
+        if not self.ipv6:
+            # The kernel fills in ICMPv6 checksums itself
+            struct.pack_into('=H', packet, 2, _icmp_checksum(packet))
+        try:
+            self.sock.sendto(packet, address)
+        except OSError:
+            return False
+        return True
+
+    def _reply_seq(self, data: bytes) -> Optional[int]:
+        """Return the sequence number if ``data`` is one of our echo replies."""
+        # Raw IPv4 sockets deliver the IP header as well
+        offset = (data[0] & 0x0F) * 4 if self.raw and not self.ipv6 else 0
+        if len(data) < offset + 8:
+            return None
+        icmp_type, _, _, ident, seq = struct.unpack_from('!BBHHH', data, offset)
+        if icmp_type != self.reply_type:
+            return None
+        # Datagram ping sockets have their identifier rewritten by the kernel
+        if self.raw and ident != self.ident:
+            return None
+        return seq
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def _icmp_checksum(data: bytes) -> int:
+    """RFC 1071 checksum of ``data``, in native byte order."""
+    if len(data) % 2:
+        data = bytes(data) + b'\x00'
+    total = sum(array.array('H', data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _tcp_ping_probes(host: str, count: Optional[int], interval: float, timeout: int,
+                     ipv6: bool) -> Iterator[Tuple[int, Optional[int]]]:
+    """Sequential ``_ping_host`` probes with the same contract as ``_IcmpPinger.run``."""
+    seq = 0
+    while count is None or seq < count:
+        seq += 1
+        start_ns = time.perf_counter_ns()
+        ok = _ping_host(host, timeout, ipv6)
+        yield seq, time.perf_counter_ns() - start_ns if ok else None
+        
+        if count is None or seq < count:
+            time.sleep(interval)
+
+
 def _ping_host(host: str, timeout: int, ipv6: bool = False) -> bool:
-    """Ping a host and return True if successful."""
+    """Probe a host with a TCP connect to port 80 (fallback without ICMP)."""
     try:
         # Resolve hostname to IP
         family = socket.AF_INET6 if ipv6 else socket.AF_INET
@@ -445,90 +664,221 @@ def _ping_host(host: str, timeout: int, ipv6: bool = False) -> bool:
         return False
 
 
-def _traceroute_hop(host: str, hop: int, timeout: int) -> Dict:
-    """Perform one hop of traceroute."""
+# First destination port for UDP traceroute probes; hop N uses base + N
+_TRACEROUTE_BASE_PORT = 33434
+
+
+def _open_traceroute_sockets(ip: str) -> Optional[Tuple[socket.socket, socket.socket]]:
+    """Open the UDP probe socket and raw ICMP listener for a native traceroute.
+
+    Returns None when raw sockets are not permitted, in which case the
+    system traceroute command is used per hop instead.
+    """
+    udp_sock = icmp_sock = None
     try:
-        # Simple implementation using socket with TTL
-        # In a real implementation, you might want to use raw sockets or system commands
-        
-        # For now, we'll simulate traceroute behavior
-        # This is a simplified version and may not work on all systems
+        # Find the local address that routes to the target; raw sockets on
+        # Windows must be bound to a concrete interface address
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+            probe.connect((ip, _TRACEROUTE_BASE_PORT))
+            local_ip = probe.getsockname()[0]
         
-        import platform
-        system = platform.system().lower()
+        udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        udp_sock.bind((local_ip, 0))
+        icmp_sock = socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+        icmp_sock.bind((local_ip, 0))
+        return udp_sock, icmp_sock
+    except OSError:
+        for sock in (udp_sock, icmp_sock):
+            if sock:
+                sock.close()
+        return None
+
+
+def _traceroute_native(udp_sock: socket.socket, icmp_sock: socket.socket, ip: str,
+                       max_hops: int, timeout: int) -> Iterator[Dict]:
+    """Trace hops with TTL-limited UDP probes and a raw ICMP listener.
+
+    Probes for every TTL are sent back-to-back and replies are collected in
+    a single wait of ``timeout`` seconds. Hops are yielded in TTL order as
+    soon as all lower hops are known, stopping at the destination.
+    """
+    src_port = udp_sock.getsockname()[1]
+    sent_at = {}
+    results = {}
+    
+    for hop in range(1, max_hops + 1):
+        try:
+            udp_sock.setsockopt(socket.IPPROTO_IP, socket.IP_TTL, hop)
+            sent_at[hop] = time.monotonic()
+            udp_sock.sendto(b'', (ip, _TRACEROUTE_BASE_PORT + hop))
+        except OSError as e:
+            results[hop] = {'hop': hop, 'status': 'error', 'error': str(e)}
+    
+    deadline = time.monotonic() + timeout
+    next_hop = 1
+    reached = None  # lowest TTL answered by the destination itself
+    
+    while True:
+        while next_hop in results:
+            yield results.pop(next_hop)
+            next_hop += 1
+        last_hop = reached or max_hops
+        if next_hop > last_hop:
+            return
         
-        if system == 'windows':
-            cmd = ['tracert', '-h', str(hop), '-w', str(timeout * 1000), host]
-        else:
-            cmd = ['traceroute', '-m', str(hop), '-w', str(timeout), host]
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        ready, _, _ = select.select([icmp_sock], [], [], remaining)
+        if not ready:
+            break
+        data, addr = icmp_sock.recvfrom(1500)
+        received_at = time.monotonic()
         
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout + 5)
-            # Parse the output (simplified)
-            lines = result.stdout.split('\n')
-            
-            for line in lines:
-                if f' {hop} ' in line or f'{hop:2d}' in line:
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        # Extract IP and time from traceroute output
-                        time_str = None
-                        ip_addr = None
-                        hostname = None
-                        
-                        for part in parts:
-                            if 'ms' in part:
-                                time_str = part.replace('ms', '')
-                            elif '.' in part and part.replace('.', '').replace(':', '').isdigit():
-                                ip_addr = part
-                        
-                        if time_str and ip_addr:
-                            try:
-                                hostname = socket.gethostbyaddr(ip_addr)[0]
-                            except:
-                                hostname = ip_addr
-                            
-                            return {
-                                'hop': hop,
-                                'ip': ip_addr,
-                                'hostname': hostname,
-                                'time': float(time_str),
-                                'status': 'success'
-                            }
-            
-            return {
-                'hop': hop,
-                'status': 'timeout'
-            }
-            
-        except subprocess.TimeoutExpired:
-            return {
-                'hop': hop,
-                'status': 'timeout'
-            }
-        except Exception as e:
-            return {
-                'hop': hop,
-                'status': 'error',
-                'error': str(e)
-            }
+        port = _icmp_probe_port(data, src_port)
+        hop = port - _TRACEROUTE_BASE_PORT if port is not None else 0
+        if hop < next_hop or hop not in sent_at or hop in results:
+            continue
+        results[hop] = {
+            'hop': hop,
+            'ip': addr[0],
+            'hostname': addr[0],
+            'time': (received_at - sent_at[hop]) * 1000,
+            'status': 'success'
+        }
+        if addr[0] == ip and (reached is None or hop < reached):
+            reached = hop
     
+    # Whatever is still missing timed out
+    for hop in range(next_hop, (reached or max_hops) + 1):
+        yield results.get(hop, {'hop': hop, 'status': 'timeout'})
+
+
+def _icmp_probe_port(data: bytes, src_port: int) -> Optional[int]:
+    """Return the UDP destination port quoted in an ICMP error for our probe.
+
+    Handles "time exceeded" (intermediate hop) and "destination unreachable"
+    (the target itself); anything else, or another socket's probe, is None.
+    """
+    if len(data) < 20:
+        return None
+    ihl = (data[0] & 0x0F) * 4
+    if len(data) < ihl + 8 or data[ihl] not in (3, 11):
+        return None
+    
+    inner = ihl + 8
+    if len(data) < inner + 20 or data[inner + 9] != socket.IPPROTO_UDP:
+        return None
+    udp = inner + (data[inner] & 0x0F) * 4
+    if len(data) < udp + 4:
+        return None
+    
+    sport, dport = struct.unpack_from('!HH', data, udp)
+    return dport if sport == src_port else None
+
+
+# Parsing of tracert/traceroute output lines such as
+#   " 3  router.example (10.0.0.1)  1.234 ms  1.101 ms  1.0 ms"
+#   "  3    <1 ms    <1 ms    <1 ms  10.0.0.1"
+_HOP_LINE_RE = re.compile(r'^\s*(\d+)\s+(.*)$')
+_HOP_TIME_RE = re.compile(r'<?(\d+(?:\.\d+)?)\s*ms\b')
+_HOP_IP_RE = re.compile(r'(\d{1,3}(?:\.\d{1,3}){3}|[0-9a-fA-F]{0,4}(?::[0-9a-fA-F]{0,4}){2,7})')
+
+
+def _echo_hop(hop_result: Dict, show_hostname: bool = True):
+    """Print one traceroute hop line."""
+    hop = hop_result['hop']
+    if hop_result['status'] == 'success':
+        line = f"{hop:2d}  {hop_result['time']:.1f} ms  {hop_result['ip']}"
+        if show_hostname:
+            line += f" ({hop_result['hostname']})"
+        click.echo(line)
+    elif hop_result['status'] == 'timeout':
+        click.echo(f"{hop:2d}  *  Request timed out")
+    else:
+        click.echo(f"{hop:2d}  !  {hop_result['error']}")
+
+
+def _traceroute_system(host: str, max_hops: int, timeout: int) -> Iterator[Dict]:
+    """Trace with one run of the system tool (no raw sockets), yielding hops in order.
+
+    Hops are parsed from the tool's output as it prints them; hops it skips
+    are reported as timeouts. Closing the generator stops the tool.
+    """
+    if _IS_WINDOWS:
+        cmd = ['tracert', '-d', '-h', str(max_hops), '-w', str(timeout * 1000), host]
+    else:
+        cmd = ['traceroute', '-n', '-m', str(max_hops), '-w', str(timeout), host]
+    
+    try:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                text=True, errors='ignore')
     except Exception as e:
+        for hop in range(1, max_hops + 1):
+            yield {'hop': hop, 'status': 'error', 'error': str(e)}
+        return
+    
+    next_hop = 1
+    try:
+        for line in proc.stdout:
+            match = _HOP_LINE_RE.match(line)
+            if not match:
+                continue
+            hop = int(match.group(1))
+            if hop < next_hop or hop > max_hops:
+                continue
+            for missing in range(next_hop, hop):
+                yield {'hop': missing, 'status': 'timeout'}
+            next_hop = hop + 1
+            yield _parse_hop_line(hop, match.group(2))
+        for missing in range(next_hop, max_hops + 1):
+            yield {'hop': missing, 'status': 'timeout'}
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+
+
+def _parse_hop_line(hop: int, rest: str) -> Dict:
+    """Pull the first RTT and address out of one tracert/traceroute hop line."""
+    time_match = _HOP_TIME_RE.search(rest)
+    ip_match = _HOP_IP_RE.search(rest)
+    if time_match and ip_match:
+        ip_addr = ip_match.group(1)
         return {
             'hop': hop,
-            'status': 'error',
-            'error': str(e)
+            'ip': ip_addr,
+            'hostname': ip_addr,
+            'time': float(time_match.group(1)),
+            'status': 'success'
         }
+    return {
+        'hop': hop,
+        'status': 'timeout'
+    }
+
+
+def _resolve_address(host: str, ipv6: bool = False) -> Tuple[int, str]:
+    """Resolve ``host`` once to ``(family, ip)`` for repeated socket use.
+
+    IPv4 unless ``ipv6`` is set, like ``ping``, so ``localhost`` does not
+    silently become ``::1`` and miss IPv4-only listeners.
+    """
+    family = socket.AF_INET6 if ipv6 else socket.AF_INET
+    _, _, _, _, sockaddr = socket.getaddrinfo(host, None, family)[0]
+    return family, sockaddr[0]
 
 
-def _check_port(host: str, port: int, timeout: float, protocol: str) -> Dict:
-    """Check if a port is open on a host."""
+def _check_port(ip: str, port: int, timeout: float, protocol: str,
+                family: int = socket.AF_INET) -> Dict:
+    """Check if a port is open on an already resolved address."""
     try:
         if protocol == 'tcp':
-            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock = socket.socket(family, socket.SOCK_STREAM)
             sock.settimeout(timeout)
             
-            result = sock.connect_ex((host, port))
+            result = sock.connect_ex((ip, port))
             sock.close()
             
             if result == 0:
@@ -542,11 +892,11 @@ def _check_port(host: str, port: int, timeout: float, protocol: str) -> Dict:
         
         elif protocol == 'udp':
             # UDP is more complex to check reliably
-            sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            sock = socket.socket(family, socket.SOCK_DGRAM)
             sock.settimeout(timeout)
             
             try:
-                sock.sendto(b'', (host, port))
+                sock.sendto(b'', (ip, port))
                 sock.recv(1024)
                 return {'status': 'open'}
             except socket.timeout:
@@ -558,12 +908,163 @@ def _check_port(host: str, port: int, timeout: float, protocol: str) -> Dict:
             finally:
                 sock.close()
     
-    except socket.gaierror:
-        return {'status': 'error', 'error': 'Host not found'}
     except Exception as e:
         return {'status': 'error', 'error': str(e)}
 
 
+# Compact status codes used while collecting scan results (0 = not scanned/error)
+_SCAN_STATUS_CODES = {'open': 1, 'closed': 2, 'filtered': 3}
+# bytes.translate() tables mapping one status code to 1 and everything else to 0
+_SCAN_STATUS_MASKS = {
+    code: bytes(int(i == code) for i in range(256))
+    for code in _SCAN_STATUS_CODES.values()
+}
+
+
+def _ports_with_status(status: bytearray, code: int) -> List[int]:
+    """Return the (sorted) port numbers whose status byte equals ``code``."""
+    return list(compress(range(len(status)), status.translate(_SCAN_STATUS_MASKS[code])))
+
+
+# SO_LINGER on with a zero timeout: close() sends RST and skips TIME_WAIT
+# (struct linger uses u_short fields on Windows, ints elsewhere)
+_LINGER_ABORT = struct.pack('HH' if _IS_WINDOWS else 'ii', 1, 0)
+
+# connect_ex() results meaning a non-blocking connect is still in progress
+_CONNECT_PENDING = {
+    errno.EINPROGRESS,
+    errno.EWOULDBLOCK,
+    errno.EAGAIN,
+    getattr(errno, 'WSAEWOULDBLOCK', errno.EWOULDBLOCK),
+}
+
+
+def _scan_ports(ip: str, family: int, ports: List[int], timeout: float, protocol: str,
+                max_in_flight: int, abortive_close: bool = False) -> Iterator[Tuple[int, Dict]]:
+    """Probe ports with non-blocking sockets multiplexed on one selector.
+
+    TCP ports get a non-blocking connect; UDP ports get an empty datagram
+    on a connected socket so ICMP port-unreachable surfaces as a refused
+    receive. At most ``max_in_flight`` probes are pending at a time. TCP
+    ports that do not answer within ``timeout`` are reported as filtered,
+    silent UDP ports as open (the usual reading of a UDP timeout). With
+    ``abortive_close`` TCP sockets are reset on close to skip TIME_WAIT.
+    """
+    if _IS_WINDOWS:
+        # select() on Windows handles at most 512 sockets
+        max_in_flight = min(max_in_flight, 500)
+    max_in_flight = max(1, max_in_flight)
+    
+    selector = selectors.DefaultSelector()
+    pending_ports = iter(ports)
+    in_flight: Dict[socket.socket, Tuple[int, float]] = {}
+    exhausted = False
+    
+    def finish(sock: socket.socket) -> int:
+        port, _ = in_flight.pop(sock)
+        selector.unregister(sock)
+        sock.close()
+        return port
+    
+    try:
+        while True:
+            # Keep the window of pending probes full
+            while not exhausted and len(in_flight) < max_in_flight:
+                port = next(pending_ports, None)
+                if port is None:
+                    exhausted = True
+                    break
+                try:
+                    sock, event = _start_probe(ip, family, port, protocol, abortive_close)
+                except OSError as e:
+                    yield port, _probe_error(port, protocol, e)
+                    continue
+                if event is None:
+                    sock.close()
+                    yield port, _connect_result(port, 0)
+                    continue
+                selector.register(sock, event)
+                in_flight[sock] = (port, time.monotonic() + timeout)
+            
+            if not in_flight:
+                break
+            
+            wait = max(0.0, min(deadline for _, deadline in in_flight.values()) - time.monotonic())
+            for key, _ in selector.select(wait):
+                sock = key.fileobj
+                if protocol == 'tcp':
+                    err = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                    port = finish(sock)
+                    yield port, _connect_result(port, err)
+                    continue
+                try:
+                    sock.recv(1024)
+                except BlockingIOError:
+                    continue
+                except OSError as e:
+                    port = finish(sock)
+                    yield port, _probe_error(port, protocol, e)
+                    continue
+                yield finish(sock), {'status': 'open'}
+            
+            now = time.monotonic()
+            for sock, (_, deadline) in list(in_flight.items()):
+                if deadline <= now:
+                    yield finish(sock), {'status': 'filtered' if protocol == 'tcp' else 'open'}
+    finally:
+        for sock in in_flight:
+            sock.close()
+        selector.close()
+
+
+def _start_probe(ip: str, family: int, port: int, protocol: str,
+                 abortive_close: bool = False) -> Tuple[socket.socket, Optional[int]]:
+    """Open a non-blocking probe socket and return it with the event to wait for.
+
+    The event is None when a TCP connect completed immediately.
+    """
+    if protocol == 'tcp':
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        if abortive_close:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+    else:
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    
+    try:
+        if protocol == 'tcp':
+            err = sock.connect_ex((ip, port))
+            if err == 0:
+                return sock, None
+            if err not in _CONNECT_PENDING:
+                raise OSError(err, os.strerror(err))
+            return sock, selectors.EVENT_WRITE
+        
+        sock.connect((ip, port))
+        sock.send(b'')
+        return sock, selectors.EVENT_READ
+    except OSError:
+        sock.close()
+        raise
+
+
+def _probe_error(port: int, protocol: str, error: OSError) -> Dict:
+    """Classify a probe that failed with an OS error."""
+    if protocol == 'tcp':
+        return _connect_result(port, error.errno or -1)
+    if isinstance(error, (ConnectionRefusedError, ConnectionResetError)):
+        # ICMP port unreachable (reported as a reset on Windows)
+        return {'status': 'closed'}
+    return {'status': 'filtered'}
+
+
+def _connect_result(port: int, err: int) -> Dict:
+    """Classify the outcome of a TCP connect attempt."""
+    if err == 0:
+        return {'status': 'open', 'service': _get_service_name(port, 'tcp')}
+    return {'status': 'closed'}
+
+
 def _get_common_ports() -> List[int]:
     """Return list of commonly used ports."""
     return [
@@ -594,6 +1095,7 @@ def _get_common_ports() -> List[int]:
     ]
 
 
+@lru_cache(maxsize=1024)
 def _get_service_name(port: int, protocol: str) -> Optional[str]:
     """Get service name for a port."""
     try:
@@ -625,6 +1127,7 @@ def _get_service_name(port: int, protocol: str) -> Optional[str]:
         return common_services.get(port)
 
 
+@lru_cache(maxsize=1024)
 def _resolve_hostname(hostname: str) -> Optional[str]:
     """Resolve hostname to IP address."""
     try:
@@ -633,46 +1136,38 @@ def _resolve_hostname(hostname: str) -> Optional[str]:
         return None
 
 
+@lru_cache(maxsize=4096)
+def _reverse_dns(ip: str) -> str:
+    """Reverse-resolve an IP address, falling back to the address itself."""
+    try:
+        return socket.gethostbyaddr(ip)[0]
+    except (OSError, UnicodeError):
+        return ip
+
+
+_DNS_RECORD_FAMILIES = {'A': socket.AF_INET, 'AAAA': socket.AF_INET6}
+
+
 def _dns_lookup(hostname: str, record_type: str, nameserver: Optional[str] = None) -> List[Dict]:
     """Perform DNS lookup."""
-    results = []
-
     try:
-        if record_type == 'A':
-            try:
-                ips = socket.gethostbyname_ex(hostname)[2]
-                for ip in ips:
-                    results.append({
-                        'type': 'A',
-                        'value': ip,
-                    })
-            except socket.gaierror:
-                pass
-
-        elif record_type == 'AAAA':
-            try:
-                ipv6_info = socket.getaddrinfo(hostname, None, socket.AF_INET6)
-                for info in ipv6_info:
-                    results.append({
-                        'type': 'AAAA',
-                        'value': info[4][0],
-                    })
-            except socket.gaierror:
-                pass
-
+        # One resolver call for the requested family; SOCK_STREAM keeps
+        # getaddrinfo from repeating each address once per socket type
+        infos = socket.getaddrinfo(hostname, None, _DNS_RECORD_FAMILIES[record_type],
+                                   socket.SOCK_STREAM)
+    except socket.gaierror:
+        return []
     except Exception as e:
         raise Exception(f"DNS lookup failed: {e}")
 
-    return results
+    addresses = dict.fromkeys(info[4][0] for info in infos)
+    return [{'type': record_type, 'value': ip} for ip in addresses]
 
 
 def _whois_lookup(query: str) -> str:
     """Perform WHOIS lookup."""
     try:
-        import platform
-        system = platform.system().lower()
-        
-        if system == 'windows':
+        if _IS_WINDOWS:
             # Windows doesn't have built-in whois, we could use nslookup
             result = subprocess.run(
                 ['nslookup', query],
@@ -702,25 +1197,22 @@ def _whois_lookup(query: str) -> str:
         return f"WHOIS lookup failed: {e}"
 
 
+# "key: value" lines, skipping %/# comments and entries without a value
+_WHOIS_LINE_RE = re.compile(r'^[ \t]*([^%#\s:][^:\n]*?)[ \t]*:[ \t]*(\S.*?)[ \t\r]*$', re.MULTILINE)
+
+
 def _parse_whois_data(whois_data: str) -> Dict:
     """Parse WHOIS data into structured format."""
     parsed = {}
     
-    for line in whois_data.split('\n'):
-        line = line.strip()
-        
-        if ':' in line and not line.startswith('%') and not line.startswith('#'):
-            key, value = line.split(':', 1)
-            key = key.strip().lower().replace(' ', '_')
-            value = value.strip()
-            
-            if key and value:
-                if key in parsed:
-                    if isinstance(parsed[key], list):
-                        parsed[key].append(value)
-                    else:
-                        parsed[key] = [parsed[key], value]
-                else:
-                    parsed[key] = value
+    for key, value in _WHOIS_LINE_RE.findall(whois_data):
+        key = key.lower().replace(' ', '_')
+        existing = parsed.get(key)
+        if existing is None:
+            parsed[key] = value
+        elif isinstance(existing, list):
+            existing.append(value)
+        else:
+            parsed[key] = [existing, value]
     
     return parsed
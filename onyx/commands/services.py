@@ -4,25 +4,311 @@ Windows services management commands.
 
 from __future__ import annotations
 
-import json
+import copy
+import marshal
+import os
 import subprocess
-from dataclasses import dataclass
-from typing import List, Optional, Dict, Any
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterator, List, Optional, Dict, Any
 
 from pathlib import Path
 import rich_click as click
 
+from onyx.commands import dumps, loads
 
-@dataclass
+
+@dataclass(slots=True)
 class ServiceInfo:
     name: str
     display_name: str
     status: str
-    start_type: str
+    start_type: str = ""
+    # Lowercased once at construction so repeated filtering does not casefold
+    # every service on every pass.
+    name_lc: str = field(init=False, repr=False, compare=False)
+    display_name_lc: str = field(init=False, repr=False, compare=False)
+    status_lc: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.name_lc = self.name.lower()
+        self.display_name_lc = self.display_name.lower()
+        self.status_lc = self.status.lower()
+
+
+_IS_WINDOWS = sys.platform == "win32"
+
+# Service enumeration results are reused for this many seconds, both within
+# one process and across back-to-back invocations via the on-disk cache.
+_CACHE_TTL = 10.0
+_CACHE_VERSION = 1
+
+# Names match the ServiceControllerStatus / ServiceStartMode enums that
+# Get-Service reports, so both enumeration paths produce the same strings.
+_SERVICE_STATES = {
+    1: "Stopped",
+    2: "StartPending",
+    3: "StopPending",
+    4: "Running",
+    5: "ContinuePending",
+    6: "PausePending",
+    7: "Paused",
+}
+_START_TYPES = {
+    0: "Boot",
+    1: "System",
+    2: "Automatic",
+    3: "Manual",
+    4: "Disabled",
+}
+
+if _IS_WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+
+    _SC_MANAGER_CONNECT = 0x0001
+    _SC_MANAGER_ENUMERATE_SERVICE = 0x0004
+    _SERVICE_QUERY_CONFIG = 0x0001
+    _SERVICE_QUERY_STATUS = 0x0004
+    _SERVICE_START = 0x0010
+    _SERVICE_STOP = 0x0020
+    _SC_ENUM_PROCESS_INFO = 0
+    _SC_STATUS_PROCESS_INFO = 0
+    _SERVICE_WIN32 = 0x00000030
+    _SERVICE_STATE_ALL = 0x00000003
+    _SERVICE_CONTROL_STOP = 0x00000001
+    _SERVICE_STOPPED = 1
+    _ERROR_INSUFFICIENT_BUFFER = 122
+    _ERROR_MORE_DATA = 234
+    _ERROR_SERVICE_ALREADY_RUNNING = 1056
+    _ERROR_SERVICE_NOT_ACTIVE = 1062
+
+    class _SERVICE_STATUS_PROCESS(ctypes.Structure):
+        _fields_ = [
+            ("dwServiceType", wintypes.DWORD),
+            ("dwCurrentState", wintypes.DWORD),
+            ("dwControlsAccepted", wintypes.DWORD),
+            ("dwWin32ExitCode", wintypes.DWORD),
+            ("dwServiceSpecificExitCode", wintypes.DWORD),
+            ("dwCheckPoint", wintypes.DWORD),
+            ("dwWaitHint", wintypes.DWORD),
+            ("dwProcessId", wintypes.DWORD),
+            ("dwServiceFlags", wintypes.DWORD),
+        ]
+
+    class _ENUM_SERVICE_STATUS_PROCESSW(ctypes.Structure):
+        _fields_ = [
+            ("lpServiceName", wintypes.LPWSTR),
+            ("lpDisplayName", wintypes.LPWSTR),
+            ("ServiceStatusProcess", _SERVICE_STATUS_PROCESS),
+        ]
+
+    class _QUERY_SERVICE_CONFIGW(ctypes.Structure):
+        _fields_ = [
+            ("dwServiceType", wintypes.DWORD),
+            ("dwStartType", wintypes.DWORD),
+            ("dwErrorControl", wintypes.DWORD),
+            ("lpBinaryPathName", wintypes.LPWSTR),
+            ("lpLoadOrderGroup", wintypes.LPWSTR),
+            ("dwTagId", wintypes.DWORD),
+            ("lpDependencies", wintypes.LPWSTR),
+            ("lpServiceStartName", wintypes.LPWSTR),
+            ("lpDisplayName", wintypes.LPWSTR),
+        ]
+
+    _advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+    _advapi32.OpenSCManagerW.argtypes = [wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD]
+    _advapi32.OpenSCManagerW.restype = wintypes.HANDLE
+    _advapi32.OpenServiceW.argtypes = [wintypes.HANDLE, wintypes.LPCWSTR, wintypes.DWORD]
+    _advapi32.OpenServiceW.restype = wintypes.HANDLE
+    _advapi32.CloseServiceHandle.argtypes = [wintypes.HANDLE]
+    _advapi32.CloseServiceHandle.restype = wintypes.BOOL
+    _advapi32.EnumServicesStatusExW.argtypes = [
+        wintypes.HANDLE,
+        ctypes.c_int,
+        wintypes.DWORD,
+        wintypes.DWORD,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+        ctypes.POINTER(wintypes.DWORD),
+        ctypes.POINTER(wintypes.DWORD),
+        wintypes.LPCWSTR,
+    ]
+    _advapi32.EnumServicesStatusExW.restype = wintypes.BOOL
+    _advapi32.QueryServiceConfigW.argtypes = [
+        wintypes.HANDLE,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+    ]
+    _advapi32.QueryServiceConfigW.restype = wintypes.BOOL
+    _advapi32.QueryServiceStatusEx.argtypes = [
+        wintypes.HANDLE,
+        ctypes.c_int,
+        ctypes.c_void_p,
+        wintypes.DWORD,
+        ctypes.POINTER(wintypes.DWORD),
+    ]
+    _advapi32.QueryServiceStatusEx.restype = wintypes.BOOL
+    _advapi32.StartServiceW.argtypes = [wintypes.HANDLE, wintypes.DWORD, ctypes.c_void_p]
+    _advapi32.StartServiceW.restype = wintypes.BOOL
+    _advapi32.ControlService.argtypes = [wintypes.HANDLE, wintypes.DWORD, ctypes.c_void_p]
+    _advapi32.ControlService.restype = wintypes.BOOL
+
+
+def _open_scm(access: int) -> int:
+    handle = _advapi32.OpenSCManagerW(None, None, access)
+    if not handle:
+        raise ctypes.WinError(ctypes.get_last_error())
+    return handle
+
+
+def _open_service(scm: int, name: str, access: int) -> int:
+    handle = _advapi32.OpenServiceW(scm, name, access)
+    if not handle:
+        raise ctypes.WinError(ctypes.get_last_error())
+    return handle
+
 
+def _scm_enum_services() -> List[ServiceInfo]:
+    """Enumerate Win32 services straight from the Service Control Manager.
 
-def _run_powershell_json(script: str) -> Any:
-    """Run a PowerShell script that returns JSON and parse it."""
+    Start types are not part of the enumeration record; they are filled in
+    later by :func:`_resolve_start_types` for the services that survive
+    filtering.
+    """
+    scm = _open_scm(_SC_MANAGER_CONNECT | _SC_MANAGER_ENUMERATE_SERVICE)
+    try:
+        services: List[ServiceInfo] = []
+        buf = ctypes.create_string_buffer(256 * 1024)
+        needed = wintypes.DWORD()
+        returned = wintypes.DWORD()
+        resume = wintypes.DWORD(0)
+        while True:
+            ok = _advapi32.EnumServicesStatusExW(
+                scm,
+                _SC_ENUM_PROCESS_INFO,
+                _SERVICE_WIN32,
+                _SERVICE_STATE_ALL,
+                buf,
+                len(buf),
+                ctypes.byref(needed),
+                ctypes.byref(returned),
+                ctypes.byref(resume),
+                None,
+            )
+            err = 0 if ok else ctypes.get_last_error()
+            if not ok and err != _ERROR_MORE_DATA:
+                raise ctypes.WinError(err)
+
+            entries = (_ENUM_SERVICE_STATUS_PROCESSW * returned.value).from_buffer(buf)
+            for entry in entries:
+                services.append(
+                    ServiceInfo(
+                        name=entry.lpServiceName or "",
+                        display_name=entry.lpDisplayName or "",
+                        status=_SERVICE_STATES.get(
+                            entry.ServiceStatusProcess.dwCurrentState, ""
+                        ),
+                    )
+                )
+
+            if ok:
+                return services
+            # ERROR_MORE_DATA: the resume handle points past what we just
+            # read; grow the buffer if the remainder will not fit.
+            if needed.value > len(buf):
+                buf = ctypes.create_string_buffer(needed.value)
+    finally:
+        _advapi32.CloseServiceHandle(scm)
+
+
+def _scm_query_start_type(scm: int, name: str) -> str:
+    handle = _open_service(scm, name, _SERVICE_QUERY_CONFIG)
+    try:
+        needed = wintypes.DWORD()
+        _advapi32.QueryServiceConfigW(handle, None, 0, ctypes.byref(needed))
+        err = ctypes.get_last_error()
+        if err != _ERROR_INSUFFICIENT_BUFFER:
+            raise ctypes.WinError(err)
+        buf = ctypes.create_string_buffer(needed.value)
+        if not _advapi32.QueryServiceConfigW(handle, buf, needed, ctypes.byref(needed)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        config = _QUERY_SERVICE_CONFIGW.from_buffer(buf)
+        return _START_TYPES.get(config.dwStartType, "")
+    finally:
+        _advapi32.CloseServiceHandle(handle)
+
+
+def _scm_query_state(handle: int) -> int:
+    status = _SERVICE_STATUS_PROCESS()
+    needed = wintypes.DWORD()
+    if not _advapi32.QueryServiceStatusEx(
+        handle,
+        _SC_STATUS_PROCESS_INFO,
+        ctypes.byref(status),
+        ctypes.sizeof(status),
+        ctypes.byref(needed),
+    ):
+        raise ctypes.WinError(ctypes.get_last_error())
+    return status.dwCurrentState
+
+
+def _scm_service_control(action: str, name: str, timeout: float = 30.0) -> None:
+    """Start/stop/restart a service through the SCM.
+
+    Mirrors ``-ErrorAction SilentlyContinue`` from the PowerShell path for the
+    benign cases: starting a running service or stopping a stopped one.
+    """
+    # Ask only for the rights the action needs, so e.g. a start-only ACL
+    # is enough for "start". Only restart polls the state, so only it queries.
+    access = {
+        "Start": _SERVICE_START,
+        "Stop": _SERVICE_STOP,
+        "Restart": _SERVICE_START | _SERVICE_STOP | _SERVICE_QUERY_STATUS,
+    }[action]
+    scm = _open_scm(_SC_MANAGER_CONNECT)
+    try:
+        handle = _open_service(scm, name, access)
+        try:
+            if action in ("Stop", "Restart"):
+                status = _SERVICE_STATUS_PROCESS()
+                if not _advapi32.ControlService(
+                    handle, _SERVICE_CONTROL_STOP, ctypes.byref(status)
+                ):
+                    err = ctypes.get_last_error()
+                    if err != _ERROR_SERVICE_NOT_ACTIVE:
+                        raise ctypes.WinError(err)
+            if action == "Restart":
+                deadline = time.monotonic() + timeout
+                while _scm_query_state(handle) != _SERVICE_STOPPED:
+                    if time.monotonic() >= deadline:
+                        raise RuntimeError(f"Timed out waiting for '{name}' to stop")
+                    time.sleep(0.25)
+            if action in ("Start", "Restart"):
+                if not _advapi32.StartServiceW(handle, 0, None):
+                    err = ctypes.get_last_error()
+                    if err != _ERROR_SERVICE_ALREADY_RUNNING:
+                        raise ctypes.WinError(err)
+        finally:
+            _advapi32.CloseServiceHandle(handle)
+    finally:
+        _advapi32.CloseServiceHandle(scm)
+
+
+def _iter_powershell_json(script: str) -> Iterator[Any]:
+    """Run a PowerShell script that prints one JSON object per line.
+
+    Records are parsed as they arrive on stdout, so parsing overlaps with
+    PowerShell still producing output. Lines that are not JSON objects
+    (warnings, banners) are skipped. stderr goes to a temporary file rather
+    than a pipe, so a flood of error records cannot block PowerShell while
+    we are still reading stdout.
+    """
     cmd = [
         "powershell",
         "-NoProfile",
@@ -31,57 +317,175 @@ def _run_powershell_json(script: str) -> Any:
         "-Command",
         script,
     ]
-    proc = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    stdout = proc.stdout or ""
-    stderr = proc.stderr or ""
-    if proc.returncode != 0 or not stdout.strip():
+    with tempfile.TemporaryFile() as err_file:
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=err_file,
+            text=True,
+            encoding="utf-8",
+            errors="ignore",
+            bufsize=1,
+        )
+        produced = False
+        with proc:
+            for line in proc.stdout:
+                line = line.strip().lstrip("\ufeff")
+                if not line.startswith("{"):
+                    continue
+                try:
+                    record = loads(line)
+                except ValueError:
+                    continue
+                produced = True
+                yield record
+        err_file.seek(0)
+        stderr = err_file.read().decode("utf-8", errors="ignore")
+    if proc.returncode != 0 and not produced:
         raise RuntimeError(stderr.strip() or "PowerShell command failed")
 
-    # PowerShell can emit BOM or warnings; try to locate JSON start.
-    out = stdout.strip()
+
+def _cache_path() -> Path:
+    base = os.environ.get("LOCALAPPDATA")
+    root = Path(base) if base else Path.home() / ".cache"
+    return root / "onyx" / "services.cache"
+
+
+def _boot_time() -> float:
+    import psutil
+
+    return psutil.boot_time()
+
+
+def _load_cached_services() -> Optional[List[ServiceInfo]]:
+    """Return services from the on-disk cache if it is still fresh."""
     try:
-        return json.loads(out)
-    except json.JSONDecodeError:
-        # Try to find first '[' or '{'
-        for ch in ("[", "{"):
-            idx = out.find(ch)
-            if idx != -1:
-                try:
-                    return json.loads(out[idx:])
-                except json.JSONDecodeError:
-                    continue
-        raise
+        with open(_cache_path(), "rb") as f:
+            version, boot_time, created, rows = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    # boot_time() is derived from uptime on some platforms and can drift by
+    # a fraction of a second between calls.
+    if version != _CACHE_VERSION or abs(boot_time - _boot_time()) > 1:
+        return None
+    if not 0 <= time.time() - created < _CACHE_TTL:
+        return None
+    # Rows written by an older ServiceInfo layout count as a cache miss
+    try:
+        return [ServiceInfo(*row) for row in rows]
+    except (TypeError, ValueError):
+        return None
+
+
+def _store_cached_services(services: List[ServiceInfo]) -> None:
+    path = _cache_path()
+    # A service caught mid start/stop would be shown in that state until the
+    # TTL runs out; leave nothing cached so the next listing looks again.
+    if any(s.status.endswith("Pending") for s in services):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return
+    rows = [(s.name, s.display_name, s.status, s.start_type) for s in services]
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            marshal.dump((_CACHE_VERSION, _boot_time(), time.time(), rows), f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def _invalidate_services_cache() -> None:
+    _get_services_cached.cache_clear()
+    try:
+        _cache_path().unlink()
+    except OSError:
+        pass
+
+
+@lru_cache(maxsize=1)
+def _get_services_cached(ttl_bucket: int) -> List[ServiceInfo]:
+    services = _load_cached_services()
+    if services is None:
+        services = _get_services()
+        _store_cached_services(services)
+    return services
+
+
+def _get_services_fresh(use_cache: bool = True) -> List[ServiceInfo]:
+    """Return services, reusing a recent enumeration when allowed.
+
+    Returns a new list of new ``ServiceInfo`` objects so callers may filter
+    and fill in start types without touching the cached copy.
+    """
+    if not use_cache:
+        services = _get_services()
+        _store_cached_services(services)
+    else:
+        services = _get_services_cached(int(time.monotonic() // _CACHE_TTL))
+    return [copy.copy(s) for s in services]
 
 
 def _get_services() -> List[ServiceInfo]:
+    """Return all Windows services.
+
+    Uses the Service Control Manager directly on Windows and falls back to
+    PowerShell Get-Service when the native call is unavailable or fails.
+    """
+    if _IS_WINDOWS:
+        try:
+            return _scm_enum_services()
+        except OSError:
+            pass
+    return _get_services_powershell()
+
+
+def _get_services_powershell() -> List[ServiceInfo]:
     """Return all Windows services via PowerShell Get-Service."""
     ps = (
-        "Get-Service | "
+        "Get-Service -ErrorAction SilentlyContinue | "
         "Select-Object Name,DisplayName,Status,StartType | "
-        "ConvertTo-Json -Depth 3"
+        "ForEach-Object { $_ | ConvertTo-Json -Compress }"
     )
-    data = _run_powershell_json(ps)
-    if isinstance(data, dict):
-        data = [data]
     services: List[ServiceInfo] = []
-    for item in data or []:
+    for item in _iter_powershell_json(ps):
         services.append(
             ServiceInfo(
-                name=item.get("Name", ""),
-                display_name=item.get("DisplayName", ""),
-                status=str(item.get("Status", "")),
-                start_type=str(item.get("StartType", "")),
+                name=item.get("Name") or "",
+                display_name=item.get("DisplayName") or "",
+                status=_enum_name(item.get("Status"), _SERVICE_STATES),
+                start_type=_enum_name(item.get("StartType"), _START_TYPES),
             )
         )
     return services
 
 
+def _enum_name(value: Any, names: Dict[int, str]) -> str:
+    # Windows PowerShell serializes enums as their integer value.
+    if isinstance(value, int):
+        return names.get(value, str(value))
+    return "" if value is None else str(value)
+
+
+def _resolve_start_types(services: List[ServiceInfo]) -> None:
+    """Fill in missing start types, querying only the given services."""
+    pending = [svc for svc in services if not svc.start_type]
+    if not pending or not _IS_WINDOWS:
+        return
+    scm = _open_scm(_SC_MANAGER_CONNECT)
+    try:
+        for svc in pending:
+            try:
+                svc.start_type = _scm_query_start_type(scm, svc.name)
+            except OSError:
+                continue
+    finally:
+        _advapi32.CloseServiceHandle(scm)
+
+
 def _filter_services(
     services: List[ServiceInfo],
     name_substring: Optional[str],
@@ -95,24 +499,39 @@ def _filter_services(
     result: List[ServiceInfo] = []
     for svc in services:
         if name_sub and (
-            name_sub not in svc.name.lower()
-            and name_sub not in svc.display_name.lower()
+            name_sub not in svc.name_lc and name_sub not in svc.display_name_lc
         ):
             continue
-        if status and svc.status.lower() != status:
-            continue
-        if start_type and svc.start_type.lower() != start_type:
+        if status and svc.status_lc != status:
             continue
         result.append(svc)
+
+    if start_type:
+        _resolve_start_types(result)
+        result = [svc for svc in result if svc.start_type.lower() == start_type]
     return result
 
 
 def _service_control(action: str, name: str) -> None:
-    """Call Windows service control via PowerShell Start-Service/Stop-Service/Restart-Service."""
+    """Start, stop or restart a Windows service.
+
+    Talks to the SCM directly on Windows; otherwise goes through PowerShell
+    Start-Service/Stop-Service/Restart-Service.
+    """
     if action not in {"Start", "Stop", "Restart"}:
         raise ValueError("Invalid action")
 
-    ps = f"{action}-Service -Name '{name}' -ErrorAction SilentlyContinue"
+    if _IS_WINDOWS:
+        _scm_service_control(action, name)
+        return
+
+    # The name is handed over through the environment rather than spliced
+    # into the script, and escaped so -Name does not treat it as a wildcard.
+    ps = (
+        f"{action}-Service "
+        "-Name ([Management.Automation.WildcardPattern]::Escape($env:ONYX_SERVICE_NAME)) "
+        "-ErrorAction SilentlyContinue"
+    )
     cmd = [
         "powershell",
         "-NoProfile",
@@ -121,7 +540,8 @@ def _service_control(action: str, name: str) -> None:
         "-Command",
         ps,
     ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
+    env = {**os.environ, "ONYX_SERVICE_NAME": name}
+    proc = subprocess.run(cmd, capture_output=True, text=True, env=env)
     if proc.returncode != 0:
         raise RuntimeError(proc.stderr.strip() or f"{action}-Service failed")
 
@@ -162,12 +582,18 @@ def services() -> None:
     show_default=True,
     help="Output format.",
 )
+@click.option(
+    "--no-cache",
+    is_flag=True,
+    help="Ignore cached results and re-enumerate services.",
+)
 def list(
     name_substring: str,
     status: str,
     start_type: str,
     limit: int,
     output: str,
+    no_cache: bool,
 ) -> None:
     """List Windows services with optional filters.
 
@@ -176,9 +602,10 @@ def list(
       onyx services list --status Running
       onyx services list --name sql --start-type Automatic
       onyx services list --output json --limit 20
+      onyx services list --no-cache
     """
     try:
-        services = _get_services()
+        services = _get_services_fresh(use_cache=not no_cache)
         services = _filter_services(services, name_substring, status, start_type)
 
         if limit and limit > 0:
@@ -188,6 +615,8 @@ def list(
             click.echo("No services matched the criteria.")
             return
 
+        _resolve_start_types(services)
+
         if output == "json":
             payload: List[Dict[str, Any]] = [
                 {
@@ -198,7 +627,7 @@ def list(
                 }
                 for s in services
             ]
-            click.echo(json.dumps(payload, indent=2, ensure_ascii=False))
+            click.echo(dumps(payload))
         else:
             # Simple table output
             click.echo(
@@ -219,6 +648,7 @@ def start(name: str) -> None:
     """Start a Windows service by name."""
     try:
         _service_control("Start", name)
+        _invalidate_services_cache()
         click.echo(f"✅ Service '{name}' start requested.")
     except Exception as e:
         click.echo(f"❌ Failed to start service '{name}': {e}", err=True)
@@ -230,6 +660,7 @@ def stop(name: str) -> None:
     """Stop a Windows service by name."""
     try:
         _service_control("Stop", name)
+        _invalidate_services_cache()
         click.echo(f"✅ Service '{name}' stop requested.")
     except Exception as e:
         click.echo(f"❌ Failed to stop service '{name}': {e}", err=True)
@@ -241,8 +672,7 @@ def restart(name: str) -> None:
     """Restart a Windows service by name."""
     try:
         _service_control("Restart", name)
+        _invalidate_services_cache()
         click.echo(f"✅ Service '{name}' restart requested.")
     except Exception as e:
         click.echo(f"❌ Failed to restart service '{name}': {e}", err=True)
-
-
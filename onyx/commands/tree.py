@@ -2,13 +2,86 @@
 Tree command for displaying directory structure.
 """
 
+import os
+import re
 from pathlib import Path
-from typing import List, Optional
+from typing import Callable, Iterator, List, Optional, Tuple
 import fnmatch
 import colorama
+from dataclasses import dataclass
 from datetime import datetime
 import rich_click as click
 
+from onyx.commands import dumps
+
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
+# Color codes bound once at import rather than looked up per line
+_BLUE = colorama.Fore.BLUE
+_GREEN = colorama.Fore.GREEN
+_WHITE = colorama.Fore.WHITE
+_YELLOW = colorama.Fore.YELLOW
+_RESET = colorama.Style.RESET_ALL
+
+
+def _walk_sizes(path, skip: Optional[Callable[[str], bool]] = None) -> Tuple[int, int, int, int]:
+    """
+    Walk a directory once and total up what is below it.
+
+    Uses ``os.scandir`` with an explicit stack, so each directory costs one
+    listing and each file a single ``stat`` (served from the directory entry
+    where the OS provides it). Symlinks are not followed.
+
+    Args:
+        path: The directory to walk.
+        skip (Optional[Callable[[str], bool]]): Predicate on entry names; matching
+            entries, and everything below them, are left out of the counts but their
+            file sizes are still totalled separately.
+
+    Returns:
+        Tuple[int, int, int, int]: Total file size in bytes, file count and directory
+        count of the entries that are not skipped, and the total file size of skipped ones.
+    """
+    total_size = 0
+    total_files = 0
+    total_dirs = 0
+    skipped_size = 0
+    stack = [(os.fspath(path), False)]
+    while stack:
+        current, skipped = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                entry_skipped = skipped or (skip is not None and skip(entry.name))
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry_skipped:
+                            total_dirs += 1
+                        stack.append((entry.path, entry_skipped))
+                    elif entry.is_file(follow_symlinks=False):
+                        size = entry.stat(follow_symlinks=False).st_size
+                        if entry_skipped:
+                            skipped_size += size
+                        else:
+                            total_size += size
+                            total_files += 1
+                except OSError:
+                    continue
+    return total_size, total_files, total_dirs, skipped_size
+
+
+@dataclass
+class TreeStats:
+    """Totals collected while drawing a tree (entries below the root only)."""
+
+    total_size: int = 0
+    total_files: int = 0
+    total_dirs: int = 0
+
 
 class TreeDrawer:
     """
@@ -24,10 +97,13 @@ class TreeDrawer:
         show_hidden (bool): Flag to show hidden files (files starting with a dot).
     """
 
-    __FORK_STRING = colorama.Fore.WHITE + '├──'
-    __CORNER_STRING = colorama.Fore.WHITE + '└──'
-    __WALL_STRING = colorama.Fore.WHITE + '│  '
+    __FORK_STRING = _WHITE + '├── '
+    __CORNER_STRING = _WHITE + '└── '
+    __WALL_STRING = _WHITE + '│  '
     __SPACE_STRING = '   '
+    __FORK_PLAIN = '├── '
+    __CORNER_PLAIN = '└── '
+    __WALL_PLAIN = '│  '
 
     def __init__(
             self,
@@ -53,12 +129,20 @@ class TreeDrawer:
         self.path = path
         self.show_files = show_files
         self.ignored_patterns = set(ignored)
+        # All patterns folded into one compiled regex, matched once per name.
+        # normcase keeps fnmatch's case-insensitive matching on Windows.
+        self._ignore_re = re.compile(
+            '|'.join(f'(?:{fnmatch.translate(os.path.normcase(p))})' for p in self.ignored_patterns)
+        ) if self.ignored_patterns else None
         self.show_modified_time = show_modified_time
         self.show_size = show_size
         self.show_hidden = show_hidden
         # Root has depth 0, first level entries depth 1, etc.
         self.max_depth = max_depth
-        colorama.init(autoreset=True)
+        self.stats = TreeStats()
+        self._colored = True
+        # Output is reset once at the end instead of colorama's per-write autoreset
+        colorama.just_fix_windows_console()
 
     def _is_ignored(self, name: str) -> bool:
         """
@@ -70,7 +154,7 @@ class TreeDrawer:
         Returns:
             bool: True if the file or directory matches any ignored pattern, False otherwise.
         """
-        return any(fnmatch.fnmatch(name, pattern) for pattern in self.ignored_patterns)
+        return self._ignore_re is not None and self._ignore_re.match(os.path.normcase(name)) is not None
 
     @staticmethod
     def _is_hidden(name: str) -> bool:
@@ -94,89 +178,314 @@ class TreeDrawer:
             size (int): The size of the file in bytes.
 
         Returns:
-            str: The size formatted as bytes (B), kilobytes (KB), or megabytes (MB).
+            str: The size formatted in the largest unit (B, KB, MB, ...) not exceeding it.
         """
         if size < 1024:
             return f'({size} B)'
-        elif size < 1024 * 1024:
-            return f'({size / 1024:.1f} KB)'
-        else:
-            return f'({size / (1024 * 1024):.1f} MB)'
+        # Every 10 bits is one unit step, so the unit index comes straight from the bit length
+        shift = min((size.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f'({size / (1 << (shift * 10)):.1f} {_SIZE_UNITS[shift]})'
 
-    def _get_directory_size(self, path: Path) -> str:
+    def _is_skipped(self, name: str) -> bool:
         """
-        Calculate the total size of a directory, including all files inside it.
+        Check if an entry is excluded from the tree, either by pattern or because it is hidden.
 
         Args:
-            path (Path): The path to the directory.
+            name (str): The name of the file or directory to check.
 
         Returns:
-            str: The total size of the directory.
+            bool: True if the entry should not be shown or counted, False otherwise.
         """
-        total_size = sum(file.stat().st_size for file in path.rglob('*') if file.is_file())
-        return self._get_size(total_size)
+        return self._is_ignored(name) or (not self.show_hidden and self._is_hidden(name))
 
-    def _tree_structure(self, path: Path, prefix: str = '', current_depth: int = 1) -> List[str]:
+    def _render(self, prefix: str, plain_prefix: str, color: str, label: str, details: List[str]) -> Tuple[str, str]:
         """
-        Recursively build the tree structure for the specified directory.
+        Build the colored and plain variants of one tree line.
+
+        When colors are not wanted (see ``lines``) the plain line is returned for both.
 
         Args:
-            path (Path): The current directory to process.
-            prefix (str): The prefix to use for each line, indicating tree structure depth.
+            prefix (str): Colored indentation and connector, including the trailing space.
+            plain_prefix (str): The same indentation and connector without colors.
+            color (str): Color for the entry label.
+            label (str): The entry label (name, with a trailing slash for directories).
+            details (List[str]): Bracketed details such as modified time and size.
 
         Returns:
-            List[str]: A list of strings representing the tree structure.
+            Tuple[str, str]: The colored line and the plain line.
         """
-        # Stop if we reached maximum depth
-        if self.max_depth is not None and current_depth > self.max_depth:
-            return []
+        plain = plain_prefix + label + ''.join(f' {d}' for d in details)
+        if not self._colored:
+            return plain, plain
+        colored = f'{prefix}{color}{label}' + ''.join(f' {_WHITE}{d}' for d in details)
+        return colored, plain
+
+    def _scan(self, path) -> Tuple[List[os.DirEntry], int]:
+        """
+        List a directory once, dropping skipped entries and ordering directories first.
 
-        entries = [e for e in path.iterdir() if not self._is_ignored(e.name)]
+        Args:
+            path: The directory to list.
+
+        Returns:
+            Tuple[List[os.DirEntry], int]: The entries to draw, and the total size of files
+            that count towards this directory's size but are not drawn: ignored and hidden
+            entries (which are left out of ``self.stats``), and files when only
+            directories are shown.
+        """
+        entries = []
+        extra_size = 0
+        with os.scandir(path) as it:
+            for entry in it:
+                if not self._is_skipped(entry.name):
+                    entries.append(entry)
+                elif self.show_size:
+                    # Not drawn or summarised, but part of the directory's size
+                    extra_size += self._skipped_size(entry)
 
         if not self.show_files:
+            # Files are not drawn but still count towards directory sizes
+            if self.show_size:
+                files_size = 0
+                for entry in entries:
+                    if entry.is_file():
+                        files_size += entry.stat().st_size
+                        self.stats.total_files += 1
+                self.stats.total_size += files_size
+                extra_size += files_size
             entries = [e for e in entries if e.is_dir()]
 
-        if not self.show_hidden:
-            entries = [e for e in entries if not self._is_hidden(e.name)]
-
         entries.sort(key=lambda x: (x.is_file(), x.name))
+        return entries, extra_size
+
+    @staticmethod
+    def _skipped_size(entry: os.DirEntry) -> int:
+        """
+        Total size of a skipped entry, including everything below it for directories.
+
+        Args:
+            entry (os.DirEntry): The ignored or hidden entry.
+
+        Returns:
+            int: Size in bytes.
+        """
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                size, _, _, skipped_size = _walk_sizes(entry.path)
+                return size + skipped_size
+            if entry.is_file():
+                return entry.stat().st_size
+        except OSError:
+            pass
+        return 0
+
+    def _tree_structure(
+            self,
+            path: Path,
+            prefix: str = '',
+            plain_prefix: str = '',
+            current_depth: int = 1,
+    ) -> Iterator[Tuple[int, str, str]]:
+        """
+        Generate the tree structure for the specified directory.
+
+        The walk is an explicit-stack depth-first traversal over ``os.scandir``, so deep
+        trees cost no Python recursion and each directory is listed exactly once.
+        Directory, file and byte totals are accumulated into ``self.stats`` during the
+        same walk, and each directory's size is the sum of its children: its line is
+        reserved when the directory is entered and rendered once its subtree is done.
+        Past ``max_depth`` the walk only continues (without producing lines) when
+        sizes are shown. Without sizes lines are yielded as the walk reaches them;
+        with sizes they are held until the walk is done.
+
+        Args:
+            path (Path): The directory to process.
+            prefix (str): The prefix to use for each line, indicating tree structure depth.
+            plain_prefix (str): The same prefix without colors.
+            current_depth (int): Depth of the entries of ``path`` (children of the root are at depth 1).
+
+        Yields:
+            Tuple[int, str, str]: (depth, colored, plain) lines representing the tree structure.
+
+        Returns:
+            int: The total size of files below ``path`` (the generator's return value).
+        """
+        # Stop drawing if we reached maximum depth; keep counting when sizes are shown
+        if self.max_depth is not None and current_depth > self.max_depth:
+            if not self.show_size:
+                return 0
+            size, files, dirs, skipped_size = _walk_sizes(path, skip=self._is_skipped)
+            self.stats.total_size += size
+            self.stats.total_files += files
+            self.stats.total_dirs += dirs
+            return size + skipped_size
+
+        result: List[Optional[Tuple[int, str, str]]] = []
+        total_size = 0
+        # Frame: [entries, next index, prefix, plain prefix, depth, subtree size, directory line]
+        # where the directory line is (result index, prefix, plain prefix, name, details) or None.
+        entries, extra_size = self._scan(path)
+        stack = [[entries, 0, prefix, plain_prefix, current_depth, extra_size, None]]
+
+        while stack:
+            # Nothing waits on a size: hand finished lines over right away
+            if result and not self.show_size:
+                yield from result
+                result.clear()
+            frame = stack[-1]
+            entries, index, prefix, plain_prefix, depth = frame[:5]
+
+            if index == len(entries):
+                stack.pop()
+                size, line = frame[5], frame[6]
+                if line is not None:
+                    line_index, line_prefix, line_plain_prefix, name, details = line
+                    if self.show_size:
+                        details.append(f'[Size: {self._get_size(size)}]')
+                    result[line_index] = (depth - 1, *self._render(
+                        line_prefix, line_plain_prefix, _BLUE, name + '/', details))
+                if stack:
+                    stack[-1][5] += size
+                else:
+                    total_size = size
+                continue
+
+            entry = entries[index]
+            frame[1] = index + 1
+            is_last = index == len(entries) - 1
+            if is_last:
+                line_prefix = prefix + self.__CORNER_STRING
+                line_plain_prefix = plain_prefix + self.__CORNER_PLAIN
+            else:
+                line_prefix = prefix + self.__FORK_STRING
+                line_plain_prefix = plain_prefix + self.__FORK_PLAIN
+
+            st = entry.stat() if self.show_modified_time else None
+            details = []
+            if st is not None:
+                modified_time = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M')
+                details.append(f'[Modified: {modified_time}]')
 
-        result = []
-        for i, entry in enumerate(entries):
-            connector = self.__CORNER_STRING if i == len(entries) - 1 else self.__FORK_STRING
             if entry.is_dir():
-                modified_time = datetime.fromtimestamp(entry.stat().st_mtime).strftime(
-                    '%Y-%m-%d %H:%M') if self.show_modified_time else ''
-                size = self._get_directory_size(entry) if self.show_size else ''
-                line = f'{prefix}{connector} {colorama.Fore.BLUE}{entry.name}/'
-                if modified_time or size:
-                    if modified_time:
-                        line += f' {colorama.Fore.WHITE}[Modified: {modified_time}]'
-                    if size:
-                        line += f' {colorama.Fore.WHITE}[Size: {size}]'
+                self.stats.total_dirs += 1
+                if self.max_depth is not None and depth + 1 > self.max_depth:
+                    # Stop drawing at maximum depth; keep counting when sizes are shown
+                    dir_size = 0
+                    if self.show_size:
+                        dir_size, files, dirs, skipped_size = _walk_sizes(entry.path, skip=self._is_skipped)
+                        self.stats.total_size += dir_size
+                        self.stats.total_files += files
+                        self.stats.total_dirs += dirs
+                        dir_size += skipped_size
+                        details.append(f'[Size: {self._get_size(dir_size)}]')
+                    frame[5] += dir_size
+                    result.append((depth, *self._render(
+                        line_prefix, line_plain_prefix, _BLUE, entry.name + '/', details)))
+                    continue
+
+                if is_last:
+                    child_prefix = prefix + self.__SPACE_STRING
+                    child_plain_prefix = plain_prefix + self.__SPACE_STRING
+                else:
+                    child_prefix = prefix + self.__WALL_STRING
+                    child_plain_prefix = plain_prefix + self.__WALL_PLAIN
+                if self.show_size:
+                    # Reserve the directory's line; it is rendered once its size is known
+                    line = (len(result), line_prefix, line_plain_prefix, entry.name, details)
+                    result.append(None)
+                else:
+                    line = None
+                    result.append((depth, *self._render(
+                        line_prefix, line_plain_prefix, _BLUE, entry.name + '/', details)))
+                children, extra_size = self._scan(entry.path)
+                stack.append([children, 0, child_prefix, child_plain_prefix, depth + 1, extra_size, line])
             else:
-                line = f'{prefix}{connector} {colorama.Fore.GREEN}{entry.name}'
+                if entry.is_file():
+                    self.stats.total_files += 1
+                    if self.show_size:
+                        file_size = (st or entry.stat()).st_size
+                        self.stats.total_size += file_size
+                        frame[5] += file_size
+                        details.append(f'[Size: {self._get_size(file_size)}]')
+                result.append((depth, *self._render(
+                    line_prefix, line_plain_prefix, _GREEN, entry.name, details)))
+
+        yield from result
+        return total_size
+
+    def iter_lines(self, colored: bool = True) -> Iterator[Tuple[int, str, str]]:
+        """
+        Generate the tree for the directory line by line, keeping each line's depth.
 
-                if self.show_modified_time:
-                    modified_time = datetime.fromtimestamp(entry.stat().st_mtime).strftime('%Y-%m-%d %H:%M')
-                    line += f' {colorama.Fore.WHITE}[Modified: {modified_time}]'
+        Without sizes lines are produced while the directory is walked. With sizes
+        every directory line needs its whole subtree, so the lines only come once
+        the walk is done. Totals are available in ``self.stats`` once exhausted.
 
-                if self.show_size and entry.is_file():
-                    size = self._get_size(entry.stat().st_size)
-                    line += f' {colorama.Fore.WHITE}[Size: {size}]'
+        Args:
+            colored (bool): Whether to build colored lines; when False (machine-readable
+                output) the colored slot holds the plain line and no color codes are formatted.
 
-            result.append(line)
+        Yields:
+            Tuple[int, str, str]: (depth, colored, plain) per line; the root has depth 0.
+        """
+        if not self.path.is_dir():
+            raise ValueError('The specified path is not a directory.')
 
-            if entry.is_dir():
-                # Recurse into children only if depth limit allows
-                child_prefix = prefix + (self.__SPACE_STRING if i == len(entries) - 1 else self.__WALL_STRING)
-                result.extend(self._tree_structure(entry, child_prefix, current_depth=current_depth + 1))
-        return result
+        self.stats = TreeStats()
+        self._colored = colored
+        # Children of root start at depth 1
+        walk = self._tree_structure(self.path, current_depth=1)
+
+        details = []
+        if self.show_modified_time:
+            root_modified_time = datetime.fromtimestamp(self.path.stat().st_mtime).strftime('%Y-%m-%d %H:%M')
+            details.append(f'[Modified: {root_modified_time}]')
+        if not self.show_size:
+            yield (0, *self._render('', '', _BLUE, self.path.name + '/', details))
+            yield from walk
+            return
+
+        children = []
+        try:
+            while True:
+                children.append(next(walk))
+        except StopIteration as done:
+            total_size = done.value
+        details.append(f'[Size: {self._get_size(total_size)}]')
+        yield (0, *self._render('', '', _BLUE, self.path.name + '/', details))
+        yield from children
+
+    def lines(self, colored: bool = True) -> List[Tuple[int, str, str]]:
+        """
+        Build the tree for the directory, keeping each line's depth.
+
+        Totals for the drawn tree are available in ``self.stats`` afterwards.
+
+        Args:
+            colored (bool): Whether to build colored lines; when False (machine-readable
+                output) the colored slot holds the plain line and no color codes are formatted.
+
+        Returns:
+            List[Tuple[int, str, str]]: (depth, colored, plain) per line; the root has depth 0.
+        """
+        return list(self.iter_lines(colored))
+
+    def render(self) -> Tuple[str, str]:
+        """
+        Build the tree for the directory as colored and plain text in one pass.
+
+        Returns:
+            Tuple[str, str]: The colored tree and the same tree without color codes.
+        """
+        lines = self.lines()
+        return '\n'.join(line for _, line, _ in lines), '\n'.join(line for _, _, line in lines)
 
     def draw(self, as_string: bool = True, save_path: Optional[Path] = None) -> str:
         """
         Generate the tree structure for the directory and print/save it.
 
+        Totals for the drawn tree are available in ``self.stats`` afterwards.
+
         Args:
             as_string (bool): Whether to return the result as a string (default is True).
             save_path (Optional[Path]): If provided, the output will be saved to the specified path.
@@ -184,34 +493,16 @@ class TreeDrawer:
         Returns:
             str: The tree structure output as a string if `as_string` is True.
         """
-        if not self.path.is_dir():
-            raise ValueError('The specified path is not a directory.')
-
-        root_modified_time = datetime.fromtimestamp(self.path.stat().st_mtime).strftime(
-            '%Y-%m-%d %H:%M') if self.show_modified_time else ''
-        root_size = self._get_directory_size(self.path) if self.show_size else ''
-
-        result = [colorama.Fore.BLUE + self.path.name + '/']
-        if root_modified_time or root_size:
-            if root_modified_time:
-                result[0] += f' {colorama.Fore.WHITE}[Modified: {root_modified_time}]'
-            if root_size:
-                result[0] += f' {colorama.Fore.WHITE}[Size: {root_size}]'
-
-        # Children of root start at depth 1
-        result.extend(self._tree_structure(self.path, current_depth=1))
-
-        output = '\n'.join(result)
+        output, plain = self.render()
         if save_path:
             save_path = save_path / 'tree_structure.txt'
             with open(save_path, 'w', encoding='utf-8') as file:
-                file.write(
-                    output.replace(colorama.Fore.BLUE, '').replace(colorama.Fore.GREEN, '').replace(colorama.Fore.WHITE, ''))
+                file.write(plain)
             print(f'Tree structure saved to {save_path}')
 
         if as_string:
             return output
-        print(output)
+        click.echo(output + _RESET)
         return ''
 
 
@@ -227,9 +518,9 @@ class TreeDrawer:
 @click.option(
     '--output',
     '-o',
-    type=click.Choice(['table', 'json', 'csv']),
+    type=click.Choice(['table', 'json', 'jsonl', 'csv']),
     default='table',
-    help='Output format (table/json/csv)',
+    help='Output format (table/json/jsonl/csv); jsonl streams unless --show-size is given',
 )
 def tree(path: Path, max_depth: int, show_hidden: bool, no_files: bool,
          show_size: bool, show_time: bool, ignore: tuple, save: Path, output: str):
@@ -242,6 +533,11 @@ def tree(path: Path, max_depth: int, show_hidden: bool, no_files: bool,
       onyx tree src --max-depth 2
       onyx tree . --no-files --show-size
       onyx tree . -i .git -i __pycache__ --save ./out
+      onyx tree . --output jsonl
+
+    With --output jsonl each record is printed as soon as the walk reaches it;
+    with --show-size records wait for the size pass, since a directory's size
+    needs its whole subtree.
     """
     
     # Convert ignore tuple to list
@@ -259,38 +555,34 @@ def tree(path: Path, max_depth: int, show_hidden: bool, no_files: bool,
     )
     
     try:
-        # Generate textual tree once (depth already limited in TreeDrawer)
-        tree_text = drawer.draw(as_string=True)
+        # Generate the tree once (depth already limited in TreeDrawer)
+        # Machine-readable formats only need the plain text
+        if output == 'jsonl':
+            # One compact record per line, printed as the walk produces it
+            lines = []
+            for line in drawer.iter_lines(colored=False):
+                click.echo(dumps({'depth': line[0], 'text': line[2]}, indent=False))
+                if save:
+                    lines.append(line)
+        else:
+            lines = drawer.lines(colored=output == 'table')
 
         # Save plain-text tree if requested (no colors)
         if save:
             save_path = save / 'tree_structure.txt'
             with open(save_path, 'w', encoding='utf-8') as file:
-                file.write(tree_text.replace(colorama.Fore.BLUE, '').replace(colorama.Fore.GREEN, '').replace(colorama.Fore.WHITE, ''))
+                file.write('\n'.join(plain for _, _, plain in lines))
             click.echo(f'Tree structure saved to {save_path}')
 
         # Output in requested format
         if output == 'table':
-            click.echo(tree_text)
-        else:
+            click.echo('\n'.join(colored for _, colored, _ in lines) + _RESET)
+        elif output != 'jsonl':
             # Build simple structured representation: level + name string per line
-            records = []
-            for line in tree_text.split('\n'):
-                stripped = line.lstrip()
-                if not stripped:
-                    continue
-                # Depth is approximated by count of tree characters
-                depth = sum(1 for ch in line if ch in ['├', '└', '│'])
-                # Strip ANSI colors
-                clean = (line
-                         .replace(colorama.Fore.BLUE, '')
-                         .replace(colorama.Fore.GREEN, '')
-                         .replace(colorama.Fore.WHITE, ''))
-                records.append({'depth': depth, 'text': clean})
+            records = [{'depth': depth, 'text': plain} for depth, _, plain in lines]
 
             if output == 'json':
-                import json as _json
-                click.echo(_json.dumps(records, indent=2, ensure_ascii=False))
+                click.echo(dumps(records))
             elif output == 'csv':
                 import csv as _csv
                 import sys as _sys
@@ -300,7 +592,7 @@ def tree(path: Path, max_depth: int, show_hidden: bool, no_files: bool,
 
         # Add summary statistics if show_size is enabled (printed in table mode only)
         if show_size and output == 'table':
-            _print_size_summary(path, ignore_patterns, show_hidden)
+            _print_size_summary(drawer.stats)
                 
     except ValueError as e:
         click.echo(f"❌ Error: {e}", err=True)
@@ -310,66 +602,28 @@ def tree(path: Path, max_depth: int, show_hidden: bool, no_files: bool,
         click.echo(f"❌ Unexpected error: {e}", err=True)
 
 
-def _print_size_summary(directory: Path, ignore_patterns: list, show_hidden: bool):
+def _print_size_summary(stats: TreeStats):
     """Print summary statistics for total file sizes."""
     
-    def should_ignore(path: Path) -> bool:
-        """Check if path should be ignored."""
-        for pattern in ignore_patterns:
-            if fnmatch.fnmatch(path.name, pattern):
-                return True
-        return False
-    
-    def is_hidden(path: Path) -> bool:
-        """Check if path is hidden."""
-        return path.name.startswith('.')
-    
-    def get_size_summary(path: Path) -> tuple:
-        """Get total size and file count recursively."""
-        total_size = 0
-        total_files = 0
-        total_dirs = 0
-        
-        try:
-            for item in path.rglob('*'):
-                # Skip if should be ignored
-                if should_ignore(item):
-                    continue
-                
-                # Skip hidden files unless show_hidden is True
-                if not show_hidden and is_hidden(item):
-                    continue
-                
-                try:
-                    if item.is_file():
-                        total_size += item.stat().st_size
-                        total_files += 1
-                    elif item.is_dir():
-                        total_dirs += 1
-                except (PermissionError, OSError):
-                    continue
-                    
-        except (PermissionError, OSError):
-            pass
-            
-        return total_size, total_files, total_dirs
-    
-    def format_size(size_bytes: int) -> str:
+    def format_size(size_bytes: float) -> str:
         """Format size in human readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} PB"
+        if size_bytes < 1024:
+            return f"{size_bytes:.1f} B"
+        shift = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+        return f"{size_bytes / (1 << (shift * 10)):.1f} {_SIZE_UNITS[shift]}"
     
-    total_size, total_files, total_dirs = get_size_summary(directory)
+    total_size, total_files, total_dirs = stats.total_size, stats.total_files, stats.total_dirs
     
-    click.echo("")
-    click.echo("📊 " + colorama.Fore.YELLOW + "Summary Statistics:")
-    click.echo(colorama.Fore.WHITE + f"   📁 Total directories: {total_dirs}")
-    click.echo(colorama.Fore.WHITE + f"   📄 Total files: {total_files}")
-    click.echo(colorama.Fore.WHITE + f"   💾 Total size: {format_size(total_size)}")
+    lines = [
+        "",
+        "📊 " + _YELLOW + "Summary Statistics:",
+        _WHITE + f"   📁 Total directories: {total_dirs}",
+        _WHITE + f"   📄 Total files: {total_files}",
+        _WHITE + f"   💾 Total size: {format_size(total_size)}",
+    ]
     
     if total_files > 0:
         avg_size = total_size / total_files
-        click.echo(colorama.Fore.WHITE + f"   📈 Average file size: {format_size(avg_size)}")
\ No newline at end of file
+        lines.append(_WHITE + f"   📈 Average file size: {format_size(avg_size)}")
+
+    click.echo("\n".join(lines) + _RESET)
\ No newline at end of file
@@ -9,8 +9,9 @@ import stat
 import time
 import shutil
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 import rich_click as click
 import psutil
@@ -23,6 +24,15 @@ def _normalize(path: Path) -> Path:
         return path
 
 
+def _path_key(path: str) -> str:
+    """Normalize a path string for comparison without touching the filesystem."""
+    if path.startswith("\\\\?\\UNC\\"):
+        path = "\\" + path[7:]
+    elif path.startswith("\\\\?\\"):
+        path = path[4:]
+    return os.path.normcase(path)
+
+
 def _clear_attributes_windows(target: Path) -> None:
     try:
         # Remove Read-only, Hidden, System flags using attrib
@@ -32,7 +42,7 @@ def _clear_attributes_windows(target: Path) -> None:
             "-H",
             "-S",
             str(target)
-        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, shell=True)
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
     except Exception:
         pass
 
@@ -58,47 +68,114 @@ def _clear_attributes_posix(target: Path) -> None:
             pass
 
 
+def _probe_pid(pid: int, matches: Callable[[str], bool]) -> Optional[Tuple[int, str, str]]:
+    """Return (pid, name, file_path) if the process holds a matching file open."""
+    try:
+        proc = psutil.Process(pid)
+        for of in proc.open_files():
+            fp = of.path
+            if fp and matches(fp):
+                # The name is only for display; don't drop a confirmed locker over it
+                try:
+                    name = proc.name() or ""
+                except Exception:
+                    name = ""
+                return (pid, name, fp)
+    except (psutil.AccessDenied, psutil.NoSuchProcess, ProcessLookupError, FileNotFoundError):
+        return None
+    except Exception:
+        return None
+    return None
+
+
+def _clear_attributes_recursive_windows(target: Path) -> None:
+    """Clear attributes of everything below ``target`` with a single attrib call."""
+    try:
+        # /S recurses into subdirectories, /D includes the directories themselves
+        subprocess.run([
+            "attrib",
+            "-R",
+            "-H",
+            "-S",
+            str(target / "*"),
+            "/S",
+            "/D",
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except Exception:
+        pass
+
+
+def _clear_attributes_recursive_posix(target: Path) -> None:
+    """Clear attributes of everything below ``target`` with one chattr call and an os.walk."""
+    # Drop immutable flags first, otherwise chmod fails on those entries
+    if shutil.which("chattr"):
+        try:
+            subprocess.run(["chattr", "-R", "-i", str(target)], check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except Exception:
+            pass
+
+    for root, dirs, files in os.walk(target):
+        for name in (*dirs, *files):
+            p = os.path.join(root, name)
+            try:
+                mode = os.lstat(p).st_mode
+                if not stat.S_ISLNK(mode):
+                    os.chmod(p, mode | stat.S_IWUSR)
+            except OSError:
+                continue
+
+
 def _find_locking_processes(target: Path) -> List[Tuple[int, str, str]]:
     """Return list of (pid, name, file_path) that keep the target open.
 
     If target is a directory, includes any open file inside that directory.
+    Processes are probed in parallel since listing open files is mostly
+    spent waiting on the kernel.
     """
-    results: List[Tuple[int, str, str]] = []
     target = _normalize(target)
-    target_str = str(target)
-    is_dir = target.is_dir()
+    target_key = _path_key(str(target))
+    # Trailing separator so /foo does not match /foobar
+    target_prefix = target_key.rstrip(os.sep) + os.sep if target.is_dir() else None
+
+    def matches(fp: str) -> bool:
+        key = _path_key(fp)
+        return key == target_key or (target_prefix is not None and key.startswith(target_prefix))
+
+    pids = psutil.pids()
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        found = executor.map(lambda pid: _probe_pid(pid, matches), pids)
+        return [r for r in found if r is not None]
+
 
-    for proc in psutil.process_iter(["pid", "name"]):
+def _terminate_processes(pids: List[int], timeout: float) -> bool:
+    """Terminate the given processes, killing any that outlive ``timeout``.
+
+    All processes are signalled first and then waited on together, so the
+    worst case is about two timeouts rather than two per process.
+    """
+    procs: List[psutil.Process] = []
+    ok = True
+    for pid in dict.fromkeys(pids):
         try:
-            for of in proc.open_files():
-                fp = of.path
-                if not fp:
-                    continue
-                if (not is_dir and os.path.samefile(fp, target_str)) or (is_dir and fp.startswith(target_str)):
-                    results.append((proc.pid, proc.info.get("name") or "", fp))
-                    break
-        except (psutil.AccessDenied, psutil.NoSuchProcess, ProcessLookupError, FileNotFoundError):
+            p = psutil.Process(pid)
+            p.terminate()
+            procs.append(p)
+        except (psutil.NoSuchProcess, ProcessLookupError):
             continue
         except Exception:
-            continue
-    return results
-
+            ok = False
 
-def _terminate_process(pid: int, timeout: float) -> bool:
-    try:
-        p = psutil.Process(pid)
-        p.terminate()
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    for p in alive:
         try:
-            p.wait(timeout=timeout)
-            return True
-        except psutil.TimeoutExpired:
             p.kill()
-            p.wait(timeout=timeout)
-            return True
-    except (psutil.NoSuchProcess, ProcessLookupError):
-        return True
-    except Exception:
-        return False
+        except (psutil.NoSuchProcess, ProcessLookupError):
+            continue
+        except Exception:
+            ok = False
+    _, alive = psutil.wait_procs(alive, timeout=timeout)
+    return ok and not alive
 
 
 @click.command()
@@ -126,14 +203,12 @@ def unlock(path: Path, force: bool, timeout: float, recursive: bool) -> None:
     try:
         if os.name == "nt":
             if recursive and target.is_dir():
-                for p in target.rglob("*"):
-                    _clear_attributes_windows(p)
+                _clear_attributes_recursive_windows(target)
             _clear_attributes_windows(target)
         else:
-            if recursive and target.is_dir():
-                for p in target.rglob("*"):
-                    _clear_attributes_posix(p)
             _clear_attributes_posix(target)
+            if recursive and target.is_dir():
+                _clear_attributes_recursive_posix(target)
         click.echo("✅ Attributes cleared (where applicable)")
     except Exception as e:
         click.echo(f"⚠️ Could not clear attributes: {e}")
@@ -154,10 +229,8 @@ def unlock(path: Path, force: bool, timeout: float, recursive: bool) -> None:
 
     # Step 3: terminate
     click.echo("🛑 Forcing termination...")
-    ok = True
-    for pid, _, _ in lockers:
-        if not _terminate_process(pid, timeout):
-            ok = False
+    if not _terminate_processes([pid for pid, _, _ in lockers], timeout):
+        click.echo("⚠️ Could not terminate every locking process")
     time.sleep(0.3)
 
     lockers_after = _find_locking_processes(target)
@@ -5,13 +5,69 @@ This module wires all subcommands together and configures `rich-click`
 for nicer, colorized help output.
 """
 
+import importlib
+
 import rich_click as click
 
-from onyx.commands import tree, count, find, backup, git, net, download, monitor
-from onyx.commands import services
-from onyx.commands.unlock import unlock
-from onyx.commands.env import env_cmd
-from onyx.commands.filehash import hash_cmd
+
+# Subcommand name -> (module, attribute, short help). Modules are only
+# imported when the command is actually used, so e.g. `onyx tree` does not
+# pay for psutil; the short help lets `onyx --help` list them without
+# importing any of them.
+_LAZY_COMMANDS = {
+    "tree": ("onyx.commands.tree", "tree",
+             "Display a directory as a visual tree."),
+    "count": ("onyx.commands.count", "count",
+              "Count lines in files under a directory."),
+    "find": ("onyx.commands.find", "find",
+             "Quick filename search or single‑file content search."),
+    "backup": ("onyx.commands.backup", "backup",
+               "Create and manage backups (full and incremental)."),
+    "git": ("onyx.commands.git", "git",
+            "Git repository analytics and statistics."),
+    "net": ("onyx.commands.net", "net",
+            "Network connectivity and diagnostic tools (ping, traceroute, ports, DNS)."),
+    "download": ("onyx.commands.download", "download",
+                 "HTTP/HTTPS download helpers with progress bars and resume support."),
+    "monitor": ("onyx.commands.monitor", "monitor",
+                "System resource monitoring and lightweight performance tools."),
+    "services": ("onyx.commands.services", "services",
+                 "Manage Windows services (list, start, stop, restart)."),
+    "unlock": ("onyx.commands.unlock", "unlock",
+               "Unlock a file or directory so it can be modified or deleted."),
+    "env": ("onyx.commands.env", "env_cmd",
+            "Show a snapshot of system / Python / Onyx environment."),
+    "hash": ("onyx.commands.filehash", "hash_cmd",
+             "Calculate file hashes and detect duplicate files."),
+}
+
+
+class LazyGroup(click.RichGroup):
+    """Group that imports subcommand modules on first use."""
+
+    _listing_help = False
+
+    def list_commands(self, ctx):
+        return sorted({*super().list_commands(ctx), *_LAZY_COMMANDS})
+
+    def get_command(self, ctx, cmd_name):
+        command = super().get_command(ctx, cmd_name)
+        if command is not None or cmd_name not in _LAZY_COMMANDS:
+            return command
+        module_name, attr, short_help = _LAZY_COMMANDS[cmd_name]
+        if self._listing_help:
+            # Only the name and short help are shown; don't import for that
+            return click.RichCommand(cmd_name, short_help=short_help)
+        command = getattr(importlib.import_module(module_name), attr)
+        self.add_command(command, cmd_name)
+        return command
+
+    def format_help(self, ctx, formatter):
+        self._listing_help = True
+        try:
+            super().format_help(ctx, formatter)
+        finally:
+            self._listing_help = False
 
 
 # Global rich-click configuration
@@ -26,7 +82,7 @@ click.rich_click.STYLE_FOOTER_TEXT = "dim"
 click.rich_click.MAX_WIDTH = 100
 
 
-@click.group()
+@click.group(cls=LazyGroup)
 @click.version_option(version="0.5.7", prog_name="onyx")
 def cli():
     """[bold]Onyx[/bold] — a toolbox of everyday CLI utilities.
@@ -52,21 +108,6 @@ def cli():
     """
 
 
-# Register commands
-cli.add_command(tree.tree)
-cli.add_command(count.count)
-cli.add_command(find.find)
-cli.add_command(backup.backup)
-cli.add_command(git.git)
-cli.add_command(net.net)
-cli.add_command(download.download)
-cli.add_command(monitor.monitor)
-cli.add_command(services.services)
-cli.add_command(unlock)
-cli.add_command(env_cmd)
-cli.add_command(hash_cmd)
-
-
 def main():
     """Entry point for the CLI."""
     cli()
@@ -0,0 +1,23 @@
+"""Tests for the top-level CLI group."""
+
+import subprocess
+import sys
+
+
+def test_top_level_help_does_not_import_commands():
+    # Run in a fresh interpreter so modules imported by other tests don't count
+    code = (
+        "import sys\n"
+        "from click.testing import CliRunner\n"
+        "from onyx.main import cli\n"
+        "result = CliRunner().invoke(cli, ['--help'])\n"
+        "assert result.exit_code == 0, result.output\n"
+        "assert 'Network connectivity' in result.output\n"
+        "loaded = [m for m in ('onyx.commands.net', 'onyx.commands.monitor', 'psutil')\n"
+        "          if m in sys.modules]\n"
+        "print(','.join(loaded))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert proc.stdout.strip() == ""